@@ -0,0 +1,43 @@
+"""Weak ETags for JSON endpoints synthesized from files on disk.
+
+The tag is derived from the (mtime_ns, size) of every input file, so it
+changes whenever an input is rewritten and costs one stat() per input.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from starlette.requests import Request
+
+
+def file_version(path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def weak_etag(*parts: Any) -> str:
+    h = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8)
+    return f'W/"{h.hexdigest()}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match matches etag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == opaque:
+            return True
+    return False
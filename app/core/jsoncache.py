@@ -0,0 +1,33 @@
+"""Small in-process cache for JSON files that are read far more often than written.
+
+load_json(path) costs a single stat() when the file is unchanged: parsed
+documents are memoized on (path, inode, mtime_ns, size). This relies on
+writers replacing files via rename (uploads, objections.json), so every
+rewrite yields a new inode and a new key. A file rewritten in place with the
+same size on a coarse-mtime filesystem would keep serving the old document.
+
+Returned objects are shared between callers and must be treated as read-only.
+"""
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+
+import orjson
+
+
+@lru_cache(maxsize=512)
+def _parse(path_str: str, ino: int, mtime_ns: int, size: int) -> Any:
+    with open(path_str, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def load_json(path: Path) -> Dict[str, Any]:
+    """Return parsed JSON object at path, or {} if missing/unreadable/invalid."""
+    try:
+        st = os.stat(path)
+        data = _parse(str(path), st.st_ino, st.st_mtime_ns, st.st_size)
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
@@ -1,22 +1,36 @@
 """Centralized logging configuration with JSON option and request correlation.
 
+Records are enqueued by a QueueHandler on root and written to stdout by a
+QueueListener thread, so request handlers never block on formatting or I/O.
+
 Env vars:
 - LOG_LEVEL: DEBUG|INFO|WARNING|ERROR (default: INFO)
 - LOG_JSON: true/false (default: false)
+
+stdout is wrapped in a 64 KB buffer; the listener flushes it when the queue
+drains, every 256 records, or at least every 200 ms under sustained load.
 """
 
-import json
+import atexit
+import io
 import logging
+import logging.handlers
 import os
+import queue
 import sys
-from datetime import datetime, timezone
+import time
 from typing import Any, Dict
 import contextvars
 
+import orjson
+
 
 # Per-request correlation id
 request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
 
+# Background listener that owns the real (blocking) stream handler
+_listener: "_BatchingQueueListener | None" = None
+
 
 class RequestIdFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:  # type: ignore[override]
@@ -28,9 +42,23 @@ class RequestIdFilter(logging.Filter):
 
 
 class JsonFormatter(logging.Formatter):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Formatting runs on the single listener thread; cache the per-second prefix
+        self._last_sec = -1
+        self._last_prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        # Time of the log call (record.created), not of formatting on the listener
+        sec = int(created)
+        if sec != self._last_sec:
+            self._last_sec = sec
+            self._last_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        return f"{self._last_prefix}.{int((created - sec) * 1e6):06d}+00:00"
+
     def format(self, record: logging.LogRecord) -> str:  # type: ignore[override]
         base: Dict[str, Any] = {
-            "ts": datetime.now(timezone.utc).isoformat(),
+            "ts": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -38,33 +66,140 @@ class JsonFormatter(logging.Formatter):
         }
         if record.exc_info:
             base["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(base, ensure_ascii=False)
+        return orjson.dumps(base).decode()
+
+
+_FLUSH_EVERY_RECORDS = 256
+_FLUSH_EVERY_S = 0.2
+
+
+def _buffered_stdout() -> io.TextIOBase:
+    """Return a 64 KB-buffered text stream over stdout's fd (falls back to sys.stdout)."""
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        return sys.stdout
+    raw = io.FileIO(fd, "w", closefd=False)
+    return io.TextIOWrapper(
+        io.BufferedWriter(raw, buffer_size=65536),
+        encoding=getattr(sys.stdout, "encoding", None) or "utf-8",
+        errors="backslashreplace",
+        line_buffering=False,
+        write_through=False,
+    )
+
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler that does not flush per record; the listener flushes in batches."""
+
+    def flush(self) -> None:  # type: ignore[override]
+        # StreamHandler.emit() calls flush() after every record; defer to flush_now()
+        pass
+
+    def flush_now(self) -> None:
+        self.acquire()
+        try:
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:  # type: ignore[override]
+        self.flush_now()
+        super().close()
+
+
+class _BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes buffered handlers once a burst of records is written."""
+
+    def __init__(self, q: Any, *handlers: logging.Handler, respect_handler_level: bool = False) -> None:
+        super().__init__(q, *handlers, respect_handler_level=respect_handler_level)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def _flush(self) -> None:
+        for h in self.handlers:
+            flush_now = getattr(h, "flush_now", None)
+            if flush_now is not None:
+                flush_now()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def dequeue(self, block: bool) -> logging.LogRecord:  # type: ignore[override]
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            # Queue drained: push out whatever the burst left in the buffer
+            if self._pending:
+                self._flush()
+            return self.queue.get(block)
+
+    def handle(self, record: logging.LogRecord) -> None:  # type: ignore[override]
+        super().handle(record)
+        self._pending += 1
+        if self._pending >= _FLUSH_EVERY_RECORDS or time.monotonic() - self._last_flush >= _FLUSH_EVERY_S:
+            self._flush()
+
+    def stop(self) -> None:  # type: ignore[override]
+        super().stop()
+        self._flush()
+
+
+def _stop_listener() -> None:
+    """Flush pending records and stop the listener thread (idempotent)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler for an in-process queue: enqueue records as-is.
+
+    The stock prepare() formats the message on the emitting thread (to make the
+    record picklable) and drops exc_info; neither is needed for a local queue.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:  # type: ignore[override]
+        return record
 
 
 def setup_logging() -> None:
+    """Install a QueueHandler on root; formatting and writes run on a listener thread."""
+    global _listener
     level = os.getenv("LOG_LEVEL", "INFO").upper()
     use_json = os.getenv("LOG_JSON", "false").lower() in {"1", "true", "yes", "on"}
 
     root = logging.getLogger()
     root.setLevel(level)
 
-    # Clear default handlers
+    # Clear default handlers (and a previous listener if setup is called twice)
     for h in list(root.handlers):
         root.removeHandler(h)
+    _stop_listener()
 
-    handler = logging.StreamHandler(stream=sys.stdout)
-    handler.addFilter(RequestIdFilter())
+    handler = _BufferedStreamHandler(stream=_buffered_stdout())
     if use_json:
         handler.setFormatter(JsonFormatter())
     else:
         handler.setFormatter(logging.Formatter(fmt="%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
-    root.addHandler(handler)
 
-    # Align uvicorn loggers with our formatter
+    # Request handlers only enqueue records. The request id is captured on the
+    # emitting side, since the contextvar is not visible from the listener thread.
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _LocalQueueHandler(q)
+    queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(queue_handler)
+
+    _listener = _BatchingQueueListener(q, handler, respect_handler_level=True)
+    _listener.start()
+
+    # Align uvicorn loggers: no own handlers, records propagate to the root queue
     for name in ["uvicorn", "uvicorn.error", "uvicorn.access"]:
         lg = logging.getLogger(name)
         lg.handlers = []
         lg.propagate = True
         lg.setLevel(level)
-
-
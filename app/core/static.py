@@ -0,0 +1,46 @@
+"""StaticFiles with Cache-Control headers.
+
+Starlette's StaticFiles already sends ETag/Last-Modified and answers
+If-None-Match/If-Modified-Since with 304; this subclass adds Cache-Control so
+browsers can reuse (or cheaply revalidate) what they already downloaded.
+
+Artifacts are rewritten in place under stable names (slides/slide-001.png,
+report.json), so unversioned URLs are served with `max_age` (revalidate by
+default). URLs carrying a `?v=<version>` query are content-versioned by the
+caller and are cached for VERSIONED_MAX_AGE.
+"""
+
+import os
+from typing import Any
+from urllib.parse import parse_qs
+
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+
+VERSIONED_MAX_AGE = 86400  # 1 day
+
+
+class CachedStaticFiles(StaticFiles):
+    def __init__(self, *args: Any, max_age: int = 0, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.max_age = max_age
+
+    def _cache_control(self, scope: Scope) -> str:
+        qs = parse_qs((scope.get("query_string") or b"").decode("latin-1"))
+        if qs.get("v"):
+            return f"public, max-age={VERSIONED_MAX_AGE}, immutable"
+        return f"public, max-age={self.max_age}, must-revalidate"
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str] | str",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        # Applies to both the full response and the 304
+        response.headers["cache-control"] = self._cache_control(scope)
+        return response
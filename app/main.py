@@ -7,13 +7,15 @@ Exposes:
 """
 
 import os
+import re
+from typing import Any, Dict
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.staticfiles import StaticFiles
 from fastapi import Request
-import uuid
+import secrets
 
 from app.core.paths import ARTIFACTS_DIR, WEB_DIR
+from app.core.static import CachedStaticFiles
 from app.core.logging import setup_logging, request_id_var
 from app.routers.process import router as process_router
 from app.routers.sessions import router as sessions_router
@@ -29,50 +31,78 @@ setup_logging()
 app = FastAPI(title="PerfectPitch MVP API")
 
 
-def _allowed_origins() -> list[str]:
+def _cors_options() -> Dict[str, Any]:
+    """CORSMiddleware options from ALLOWED_ORIGINS (comma-separated, default "*").
+
+    "*" disables credentials (browsers reject credentialed wildcard responses
+    anyway), which lets Starlette answer with a static "*" instead of echoing the
+    origin. Long lists are compiled into a single anchored regex, so the
+    per-request origin check is one C-level match rather than a list scan.
+    """
     raw = os.getenv("ALLOWED_ORIGINS", "*")
-    if raw.strip() == "*":
-        return ["*"]
-    try:
-        return [s.strip() for s in raw.split(",") if s.strip()]
-    except Exception:
-        return ["*"]
+    origins = [s.strip() for s in raw.split(",") if s.strip()]
+    if not origins or "*" in origins:
+        return {"allow_origins": ["*"], "allow_credentials": False}
+    if len(origins) > 5:
+        pattern = "(?:" + "|".join(re.escape(o) for o in origins) + r")\Z"
+        return {"allow_origins": [], "allow_origin_regex": pattern, "allow_credentials": True}
+    return {"allow_origins": origins, "allow_credentials": True}
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=_allowed_origins(),
-    allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    **_cors_options(),
 )
 
 app.mount(
     "/artifacts",
-    StaticFiles(directory=str(ARTIFACTS_DIR), html=False),
+    CachedStaticFiles(directory=str(ARTIFACTS_DIR), html=False, max_age=0),
     name="artifacts",
 )
 app.mount(
     "/ui",
-    StaticFiles(directory=str(WEB_DIR), html=True),
+    CachedStaticFiles(directory=str(WEB_DIR), html=True, max_age=3600),
     name="ui",
 )
 
-@app.get("/health")
-def health():
-    # Dependency checks
-    def has_bin(name: str) -> bool:
+def _index_path() -> Dict[str, str]:
+    """Map executable name -> first full path, with one listdir() per PATH entry."""
+    index: Dict[str, str] = {}
+    for d in os.environ.get("PATH", "").split(os.pathsep):
+        if not d:
+            continue
         try:
-            import shutil
-            return shutil.which(name) is not None
-        except Exception:
-            return False
+            names = os.listdir(d)
+        except OSError:
+            continue
+        for name in names:
+            index.setdefault(name, os.path.join(d, name))
+    return index
+
+
+def _has_bin(name: str, index: Dict[str, str]) -> bool:
+    # Only the candidates we care about pay an access() check, not every PATH entry
+    path = index.get(name)
+    return path is not None and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+# Binary dependencies do not change at runtime: probe PATH once at import.
+# poppler is used by pdf2image; no reliable import check,
+# but 'pdftoppm' binary indicates presence
+_PATH_INDEX = _index_path()
+_BIN_DEPS = {
+    "ffmpeg": _has_bin("ffmpeg", _PATH_INDEX),
+    "soffice": _has_bin("soffice", _PATH_INDEX) or _has_bin("libreoffice", _PATH_INDEX),
+    "poppler_pdftoppm": _has_bin("pdftoppm", _PATH_INDEX),
+}
+del _PATH_INDEX
+
 
-    # poppler is used by pdf2image; no reliable import check,
-    # but 'pdftoppm' binary indicates presence
+@app.get("/health")
+def health():
     deps = {
-        "ffmpeg": has_bin("ffmpeg"),
-        "soffice": has_bin("soffice") or has_bin("libreoffice"),
-        "poppler_pdftoppm": has_bin("pdftoppm"),
+        **_BIN_DEPS,
         "openai_key": bool(os.getenv("OPENAI_API_KEY")),
         "openrouter_key": bool(os.getenv("OPENROUTER_API_KEY")),
     }
@@ -89,9 +119,29 @@ app.include_router(text_router)
 app.include_router(questions_router)
 
 
+def _check_unique_routes(app: FastAPI) -> None:
+    """Fail fast if a router was included twice (same method + path registered again)."""
+    seen: set[tuple[str, str]] = set()
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or {"*"}:
+            key = (method, route.path)
+            if key in seen:
+                raise RuntimeError(f"Duplicate route registered: {method} {route.path}")
+            seen.add(key)
+
+
+_check_unique_routes(app)
+
+
+_MAX_REQUEST_ID_LEN = 64
+
+
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
-    rid = request.headers.get("x-request-id") or uuid.uuid4().hex
+    # Reuse a caller-supplied id (bounded, to keep log lines sane); else 16 hex chars
+    rid = request.headers.get("x-request-id")
+    if not rid or len(rid) > _MAX_REQUEST_ID_LEN:
+        rid = secrets.token_hex(8)
     token = request_id_var.set(rid)
     try:
         response = await call_next(request)
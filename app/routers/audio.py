@@ -1,11 +1,17 @@
 """Audio chunk upload and finalize endpoints for recorded speech.
 
 Chunks are appended to uploads/{session_id}/audio.webm.part and later finalized
-to uploads/{session_id}/audio.webm.
+to uploads/{session_id}/audio.webm. The .part file is kept open (O_APPEND) per
+session across chunks, in a small LRU of file descriptors.
 """
 
+import asyncio
+import errno
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, BinaryIO, Dict, List
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
 
@@ -14,33 +20,117 @@ import logging
 
 
 router = APIRouter()
+_log = logging.getLogger(__name__)
+
+_COPY_BUFSIZE = 1 << 20  # 1 MB
+_MAX_APPENDERS = 256
+_OPEN_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_CLOEXEC", 0)
+
+
+class _Appender:
+    """An O_APPEND fd for one session's .part file; the lock guards use vs close."""
+
+    __slots__ = ("fd", "lock")
+
+    def __init__(self, path: Path) -> None:
+        self.fd = os.open(str(path), _OPEN_FLAGS, 0o644)
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        with self.lock:
+            if self.fd >= 0:
+                os.close(self.fd)
+                self.fd = -1
+
+
+_appenders: "OrderedDict[str, _Appender]" = OrderedDict()
+_appenders_lock = threading.Lock()
+
+
+def _get_appender(session_id: str, path: Path) -> _Appender:
+    evicted: List[_Appender] = []
+    with _appenders_lock:
+        app = _appenders.get(session_id)
+        if app is not None and app.fd >= 0:
+            _appenders.move_to_end(session_id)
+            return app
+        app = _Appender(path)
+        _appenders[session_id] = app
+        while len(_appenders) > _MAX_APPENDERS:
+            _, old = _appenders.popitem(last=False)
+            evicted.append(old)
+    for old in evicted:
+        old.close()
+    return app
+
+
+def close_appender(session_id: str) -> None:
+    """Close the cached .part fd for a session (before rename/delete)."""
+    with _appenders_lock:
+        app = _appenders.pop(session_id, None)
+    if app is not None:
+        app.close()
+
+
+def _append_chunk(session_id: str, src: BinaryIO, path: Path) -> int:
+    """Append src to the session's .part file in fixed-size blocks; returns bytes written."""
+    while True:
+        app = _get_appender(session_id, path)
+        with app.lock:
+            if app.fd < 0:
+                continue  # evicted between lookup and lock; reopen
+            total = 0
+            while True:
+                buf = src.read(_COPY_BUFSIZE)
+                if not buf:
+                    return total
+                view = memoryview(buf)
+                while view:
+                    view = view[os.write(app.fd, view):]
+                total += len(buf)
+
+
+def _move_file(src: Path, dst: Path) -> None:
+    """rename(); across filesystems (EXDEV) copy in-kernel with sendfile, then unlink."""
+    try:
+        src.rename(dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        while os.sendfile(fout.fileno(), fin.fileno(), None, _COPY_BUFSIZE):
+            pass
+    src.unlink()
 
 
 @router.post("/audio/{session_id}/chunk")
 async def upload_audio_chunk(session_id: str, chunk: UploadFile = File(...)) -> Dict[str, Any]:
-    folder = UPLOADS_DIR / session_id
-    if not folder.exists():
+    path = UPLOADS_DIR / session_id / "audio.webm.part"
+    # append chunk bytes (streamed from the spooled upload, off the event loop);
+    # the first open fails with FileNotFoundError if the session folder is missing
+    try:
+        written = await asyncio.to_thread(_append_chunk, session_id, chunk.file, path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Session not found")
-    path = folder / "audio.webm.part"
-    # append chunk bytes
-    data = await chunk.read()
-    with open(path, "ab") as f:
-        f.write(data)
-    logging.getLogger(__name__).info("audio_chunk", extra={"session_id": session_id, "bytes": len(data), "path": str(path)})
+    # Fires every ~250 ms per recording: DEBUG, and args are only formatted if emitted
+    _log.debug("audio_chunk sid=%s bytes=%d", session_id, written)
     return {"ok": True}
 
 
 @router.post("/audio/{session_id}/finalize")
 def finalize_audio(session_id: str) -> Dict[str, Any]:
     folder = UPLOADS_DIR / session_id
-    if not folder.exists():
-        raise HTTPException(status_code=404, detail="Session not found")
     part = folder / "audio.webm.part"
     final = folder / "audio.webm"
-    if not part.exists():
+    close_appender(session_id)
+    try:
+        _move_file(part, final)
+    except FileNotFoundError:
+        if not folder.exists():
+            raise HTTPException(status_code=404, detail="Session not found")
         raise HTTPException(status_code=400, detail="No chunks uploaded")
-    part.rename(final)
-    logging.getLogger(__name__).info("audio_finalized", extra={"session_id": session_id, "audio": str(final)})
+    _log.info("audio_finalized sid=%s audio=%s", session_id, final)
     return {"ok": True, "audio": f"uploads/{session_id}/audio.webm"}
 
 
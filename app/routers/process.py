@@ -8,6 +8,7 @@ from app.services.tasks import start_process
 
 
 router = APIRouter()
+_log = logging.getLogger(__name__)
 
 
 @router.post("/process/{session_id}")
@@ -16,7 +17,7 @@ def process_uuid(session_id: str):
     if not folder.exists():
         raise HTTPException(status_code=404, detail=f"Upload folder not found: {folder}")
     task_id = start_process(session_id)
-    logging.getLogger(__name__).info("process_started", extra={"session_id": session_id, "task_id": task_id})
+    _log.info("process_started sid=%s task_id=%s", session_id, task_id)
     return {"task_id": task_id}
 
 
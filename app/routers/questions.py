@@ -1,13 +1,22 @@
 """Objections (questions) generation based on transcript and meta.
 
 GET /questions/{session_id} — returns generated objections with answers for roles.
+
+Responses carry a weak ETag derived from the transcript/meta file versions.
+A matching If-None-Match gets 304. When the persisted objections.json was
+generated from the same inputs, it is served without calling the LLM.
 """
 
-from typing import Any, Dict
+import asyncio
+import os
+from typing import Any, Dict, Optional, Tuple
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Response
 
+from app.core.etag import file_version, if_none_match, weak_etag
+from app.core.jsoncache import load_json
 from app.core.paths import UPLOADS_DIR, ARTIFACTS_DIR
 from app.services.judge import generate_objections_with_answers
 
@@ -16,44 +25,92 @@ router = APIRouter()
 
 
 def _read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8") if path.exists() else ""
+    # One open() instead of exists() + read_text(); bytes.decode skips newline translation
+    try:
+        return path.read_bytes().decode("utf-8")
+    except FileNotFoundError:
+        return ""
+
+
+def _write_json(path: Path, obj: Any) -> None:
+    # Replace, never rewrite in place: load_json keys its cache on the inode,
+    # and a reader must not see a half-written file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    os.replace(tmp, path)
+
+
+def _inputs_etag(session_id: str, folder: Path, out: Path) -> Optional[str]:
+    versions: Tuple[Any, ...] = (
+        file_version(folder / "transcript.txt"),
+        file_version(out / "transcript.txt"),
+        file_version(folder / "meta.json"),
+    )
+    if versions[0] is None and versions[1] is None:
+        return None  # no transcript: let the normal path report the error
+    return weak_etag("objections", session_id, *versions)
 
 
-def _load_json(path: Path) -> Dict[str, Any]:
-    import json
-    if not path.exists():
-        return {}
+def _load_persisted(out: Path, etag: str) -> Optional[Dict[str, Any]]:
+    """objections.json if it was generated from inputs with this etag."""
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+        if (out / "objections.etag").read_text(encoding="utf-8") != etag:
+            return None
+    except OSError:
+        return None
+    res = load_json(out / "objections.json")
+    # Results persisted from a failed generation carry no roles
+    return res if res and res.get("roles") else None
+
+
+def _persist(out: Path, res: Dict[str, Any], etag: Optional[str]) -> None:
+    _write_json(out / "objections.json", res)
+    if etag is not None:
+        (out / "objections.etag").write_text(etag, encoding="utf-8")
 
 
 @router.get("/questions/{session_id}")
-def get_questions(session_id: str) -> Dict[str, Any]:
+async def get_questions(session_id: str, request: Request, response: Response) -> Any:
     folder = UPLOADS_DIR / session_id
-    if not folder.exists():
-        raise HTTPException(status_code=404, detail="Session not found")
+    out = ARTIFACTS_DIR / session_id
 
-    transcript = _read_text(folder / "transcript.txt")
-    if not transcript:
-        # fallback: pipeline writes transcript into artifacts/{sid}
-        transcript = _read_text((ARTIFACTS_DIR / session_id) / "transcript.txt")
+    etag = await asyncio.to_thread(_inputs_etag, session_id, folder, out)
+    if etag is not None:
+        if if_none_match(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        persisted = await asyncio.to_thread(_load_persisted, out, etag)
+        if persisted is not None:
+            response.headers["ETag"] = etag
+            return persisted
+
+    # Independent reads run concurrently; the artifacts transcript is the
+    # fallback written by the pipeline
+    transcript, transcript_art, meta = await asyncio.gather(
+        asyncio.to_thread(_read_text, folder / "transcript.txt"),
+        asyncio.to_thread(_read_text, out / "transcript.txt"),
+        asyncio.to_thread(load_json, folder / "meta.json"),
+    )
+    transcript = transcript or transcript_art
     if not transcript:
+        if not folder.exists():
+            raise HTTPException(status_code=404, detail="Session not found")
         raise HTTPException(status_code=400, detail="Transcript not found; record audio first.")
-    meta = _load_json(folder / "meta.json")
 
     # Simplified generation: use only transcript and meta to speed up
-    res = generate_objections_with_answers(transcript, meta)
+    res = await asyncio.to_thread(generate_objections_with_answers, transcript, meta)
 
+    # An empty result is what generation returns on failure: don't persist it
+    # or hand out an ETag, so the next request regenerates
+    if not res.get("roles"):
+        return res
     # persist for UI reuse
-    out = ARTIFACTS_DIR / session_id
-    out.mkdir(parents=True, exist_ok=True)
     try:
-        import json
-        (out / "objections.json").write_text(json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8")
+        await asyncio.to_thread(_persist, out, res, etag)
     except Exception:
         pass
+    if etag is not None:
+        response.headers["ETag"] = etag
     return res
 
 
@@ -1,17 +1,20 @@
 """Session lifecycle endpoints: create and delete session directories."""
 
-import json
+import shutil
 import uuid
 from pathlib import Path
 from typing import Any, Dict
 
+import orjson
 from fastapi import APIRouter, HTTPException
 import logging
 
 from app.core.paths import UPLOADS_DIR, ARTIFACTS_DIR
+from app.routers.audio import close_appender
 
 
 router = APIRouter()
+_log = logging.getLogger(__name__)
 
 
 @router.post("/sessions")
@@ -19,8 +22,8 @@ def create_session() -> Dict[str, Any]:
     session_id = uuid.uuid4().hex
     folder = UPLOADS_DIR / session_id
     folder.mkdir(parents=True, exist_ok=True)
-    (folder / "meta.json").write_text(json.dumps({"session_id": session_id}, ensure_ascii=False), encoding="utf-8")
-    logging.getLogger(__name__).info("session_created", extra={"session_id": session_id, "folder": str(folder)})
+    (folder / "meta.json").write_bytes(orjson.dumps({"session_id": session_id}))
+    _log.info("session_created sid=%s folder=%s", session_id, folder)
     return {
         "session_id": session_id,
         "upload_urls": {
@@ -35,14 +38,17 @@ def create_session() -> Dict[str, Any]:
 def delete_session(session_id: str) -> Dict[str, Any]:
     folder = UPLOADS_DIR / session_id
     art = ARTIFACTS_DIR / session_id
-    if not folder.exists() and not art.exists():
+    close_appender(session_id)
+    removed = False
+    for d in (folder, art):
+        try:
+            shutil.rmtree(d)
+            removed = True
+        except FileNotFoundError:
+            pass
+    if not removed:
         raise HTTPException(status_code=404, detail="Session not found")
-    import shutil
-    if folder.exists():
-        shutil.rmtree(folder)
-    if art.exists():
-        shutil.rmtree(art)
-    logging.getLogger(__name__).info("session_deleted", extra={"session_id": session_id})
+    _log.info("session_deleted sid=%s", session_id)
     return {"ok": True}
 
 
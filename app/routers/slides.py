@@ -1,14 +1,18 @@
 """Slide content and rendering endpoints.
 
-GET /slides/{session_id} returns parsed slide texts/notes.
+GET /slides/{session_id} returns parsed slide texts/notes (ETag from the deck file).
 POST /slides/{session_id}/render creates PNG images for slides and returns URLs.
 """
 
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, List, NoReturn, Tuple
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Response
 
+from app.core.etag import file_version, if_none_match, weak_etag
+from app.core.jsoncache import load_json
 from app.core.paths import UPLOADS_DIR, ARTIFACTS_DIR
 from app.services.pptx_parser import parse_pptx_metrics
 from app.services.judge import review_deck_per_slide
@@ -18,65 +22,91 @@ from app.services.pptx_render import render_pptx_to_images
 router = APIRouter()
 
 
+_PRESENTATION_NAMES = ("pptx.pptm", "pptx.pptx", "presentation.pptx")
+
+# folder -> (folder mtime_ns, resolved presentation); only hits are cached
+_presentation_cache: Dict[str, Tuple[int, Path]] = {}
+_PRESENTATION_CACHE_MAX = 512
+
+
 def _find_presentation(folder: Path) -> Path | None:
-    for name in ["pptx.pptm", "pptx.pptx", "presentation.pptx"]:
+    # Adding/renaming files bumps the folder mtime, which invalidates the entry
+    try:
+        mtime_ns = folder.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    key = str(folder)
+    cached = _presentation_cache.get(key)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    for name in _PRESENTATION_NAMES:
         p = folder / name
         if p.exists():
+            if len(_presentation_cache) >= _PRESENTATION_CACHE_MAX:
+                _presentation_cache.clear()
+            _presentation_cache[key] = (mtime_ns, p)
             return p
     return None
 
 
-@router.get("/slides/{session_id}")
-def get_slides(session_id: str) -> Dict[str, Any]:
-    folder = UPLOADS_DIR / session_id
+def _raise_missing(folder: Path) -> NoReturn:
+    # Only stat the session folder on the failure path to pick 404 vs 400
     if not folder.exists():
         raise HTTPException(status_code=404, detail="Session not found")
+    raise HTTPException(status_code=400, detail="Presentation not found")
+
+
+@router.get("/slides/{session_id}")
+def get_slides(session_id: str, request: Request, response: Response) -> Any:
+    folder = UPLOADS_DIR / session_id
     ppt = _find_presentation(folder)
     if ppt is None:
-        raise HTTPException(status_code=400, detail="Presentation not found")
+        _raise_missing(folder)
+    etag = weak_etag("slides", session_id, ppt.name, file_version(ppt))
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
     slides, metrics = parse_pptx_metrics(ppt)
+    response.headers["ETag"] = etag
     return {"slides": slides, "count": len(slides), "metrics": metrics}
 
 
 @router.post("/slides/{session_id}/render")
 def render_slides(session_id: str) -> Dict[str, Any]:
     folder = UPLOADS_DIR / session_id
-    if not folder.exists():
-        raise HTTPException(status_code=404, detail="Session not found")
     ppt = _find_presentation(folder)
     if ppt is None:
-        raise HTTPException(status_code=400, detail="Presentation not found")
+        _raise_missing(folder)
     out_dir = ARTIFACTS_DIR / session_id / "slides"
     try:
         paths: List[Path] = render_pptx_to_images(ppt, out_dir)
     except RuntimeError as e:
         # LibreOffice or conversion not available; degrade gracefully to text-only slides
         return {"images": [], "count": 0, "warning": str(e)}
-    urls = [f"/artifacts/{session_id}/slides/{p.name}" for p in paths]
+    # Version by mtime so browsers can cache images until the deck is re-rendered
+    urls = [f"/artifacts/{session_id}/slides/{p.name}?v={p.stat().st_mtime_ns:x}" for p in paths]
     return {"images": urls, "count": len(urls)}
 
 
+def _write_json(path: Path, obj: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+
+
 @router.post("/slides/{session_id}/review")
-def review_slides(session_id: str) -> Dict[str, Any]:
+async def review_slides(session_id: str) -> Dict[str, Any]:
     folder = UPLOADS_DIR / session_id
-    if not folder.exists():
-        raise HTTPException(status_code=404, detail="Session not found")
-    ppt = _find_presentation(folder)
+    ppt = await asyncio.to_thread(_find_presentation, folder)
     if ppt is None:
-        raise HTTPException(status_code=400, detail="Presentation not found")
-    import json
-    meta = {}
-    try:
-        meta = json.loads((folder / "meta.json").read_text(encoding="utf-8"))
-    except Exception:
-        meta = {}
-    slides, metrics = parse_pptx_metrics(ppt)
-    reviewed = review_deck_per_slide(slides, metrics, meta)
+        await asyncio.to_thread(_raise_missing, folder)
+    # meta.json read overlaps with PPTX parsing
+    meta, (slides, metrics) = await asyncio.gather(
+        asyncio.to_thread(load_json, folder / "meta.json"),
+        asyncio.to_thread(parse_pptx_metrics, ppt),
+    )
+    reviewed = await asyncio.to_thread(review_deck_per_slide, slides, metrics, meta)
     # persist
-    out_dir = ARTIFACTS_DIR / session_id
-    out_dir.mkdir(parents=True, exist_ok=True)
     try:
-        (out_dir / "slides_review.json").write_text(json.dumps(reviewed, ensure_ascii=False, indent=2), encoding="utf-8")
+        await asyncio.to_thread(_write_json, ARTIFACTS_DIR / session_id / "slides_review.json", reviewed)
     except Exception:
         pass
     return reviewed
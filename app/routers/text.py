@@ -6,8 +6,10 @@ POST /text/{session_id}/analyze — analyze uploaded script with GPT given meta.
 from typing import Any, Dict
 from pathlib import Path
 
+import orjson
 from fastapi import APIRouter, HTTPException
 
+from app.core.jsoncache import load_json
 from app.core.paths import UPLOADS_DIR, ARTIFACTS_DIR
 from app.services.doc_parser import parse_word_script
 from app.services.judge import analyze_script_with_meta
@@ -16,19 +18,11 @@ from app.services.judge import analyze_script_with_meta
 router = APIRouter()
 
 
-def _load_meta(folder: Path) -> Dict[str, Any]:
-    import json
-    p = folder / "meta.json"
-    try:
-        return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
-    except Exception:
-        return {}
-
-
 def _load_script_text(folder: Path) -> str:
-    txt_path = folder / "script.txt"
-    if txt_path.exists():
-        return txt_path.read_text(encoding="utf-8")
+    try:
+        return (folder / "script.txt").read_bytes().decode("utf-8")
+    except FileNotFoundError:
+        pass
     # try word
     for name in ["word.docx", "word.docm", "script.docx", "script.docm", "word.doc"]:
         p = folder / name
@@ -44,22 +38,21 @@ def _load_script_text(folder: Path) -> str:
 @router.post("/text/{session_id}/analyze")
 def analyze_text(session_id: str) -> Dict[str, Any]:
     folder = UPLOADS_DIR / session_id
-    if not folder.exists():
-        raise HTTPException(status_code=404, detail="Session not found")
 
     script_text = _load_script_text(folder)
     if not script_text:
+        if not folder.exists():
+            raise HTTPException(status_code=404, detail="Session not found")
         raise HTTPException(status_code=400, detail="Script text not found. Upload script.txt or Word file.")
 
-    meta = _load_meta(folder)
+    meta = load_json(folder / "meta.json")
     result = analyze_script_with_meta(script_text, meta)
 
     # persist partial artifacts for UI reuse
     out_dir = ARTIFACTS_DIR / session_id
     out_dir.mkdir(parents=True, exist_ok=True)
     try:
-        import json
-        (out_dir / "text_analysis.json").write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        (out_dir / "text_analysis.json").write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     except Exception:
         pass
     return result
@@ -4,8 +4,9 @@ POST /uploads/{session_id} accepts multipart form-data with a single file field.
 The filename determines how it is stored (e.g., pptx.pptx, meta.json, data.json).
 """
 
+import asyncio
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, BinaryIO, Dict
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
 
@@ -14,28 +15,54 @@ import logging
 
 
 router = APIRouter()
+_log = logging.getLogger(__name__)
 
 
 MAX_UPLOAD_BYTES = 50 * 1024 * 1024  # 50 MB
+_COPY_BUFSIZE = 1 << 20  # 1 MB
+
+
+class _UploadTooLarge(Exception):
+    pass
+
+
+def _save_limited(src: BinaryIO, dest: Path, limit: int) -> int:
+    """Stream src into dest in fixed-size blocks, enforcing a byte limit.
+
+    Writes to a temporary sibling and renames on success, so an oversized upload
+    never clobbers a previously saved file. Returns number of bytes written.
+    """
+    tmp = dest.with_name(dest.name + ".upload")
+    total = 0
+    try:
+        with open(tmp, "wb") as dst:
+            while True:
+                buf = src.read(_COPY_BUFSIZE)
+                if not buf:
+                    break
+                total += len(buf)
+                if total > limit:
+                    raise _UploadTooLarge()
+                dst.write(buf)
+        tmp.replace(dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return total
 
 
 @router.post("/uploads/{session_id}")
 async def upload_files(session_id: str, file: UploadFile = File(...)) -> Dict[str, Any]:
     folder = UPLOADS_DIR / session_id
-    if not folder.exists():
-        raise HTTPException(status_code=404, detail="Session not found")
     filename = file.filename or "uploaded.bin"
     dest = folder / filename
-    content = await file.read()
-    if len(content) > MAX_UPLOAD_BYTES:
+    try:
+        written = await asyncio.to_thread(_save_limited, file.file, dest, MAX_UPLOAD_BYTES)
+    except _UploadTooLarge:
         raise HTTPException(status_code=413, detail=f"File too large (> {MAX_UPLOAD_BYTES} bytes)")
-    dest.write_bytes(content)
-    logging.getLogger(__name__).info("upload_saved", extra={
-        "session_id": session_id,
-        "upload_filename": filename,
-        "bytes": len(content),
-        "dest": str(dest),
-    })
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    _log.info("upload_saved sid=%s file=%s bytes=%d dest=%s", session_id, filename, written, dest)
     return {"ok": True, "saved_as": f"uploads/{session_id}/{filename}"}
 
 
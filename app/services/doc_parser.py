@@ -1,13 +1,12 @@
 """Utilities to parse speech script from Word documents.
 
 Supports .docx/.docm via python-docx; for legacy .doc, return a basic notice.
+python-docx (and lxml) is imported on first use to keep app startup fast.
 """
 
 from pathlib import Path
 from typing import Dict, Any
 
-from docx import Document  # type: ignore
-
 
 def parse_word_script(path: Path) -> Dict[str, Any]:
     """Extract plain text paragraphs from a Word document.
@@ -17,6 +16,8 @@ def parse_word_script(path: Path) -> Dict[str, Any]:
     if not path.exists():
         raise FileNotFoundError(f"File not found: {path}")
     if path.suffix.lower() in {".docx", ".docm"}:
+        from docx import Document  # type: ignore
+
         doc = Document(str(path))
         paragraphs = [p.text.strip() for p in doc.paragraphs if p.text and p.text.strip()]
         text = "\n".join(paragraphs)
@@ -1,18 +1,155 @@
 """LLM judging and feedback generation services.
 
-judge_slides_batched supports multimodal scoring with slide images.
+judge_slides_batched supports multimodal scoring with slide images; batches are
+sent concurrently through the async client. submit_judge_batch/collect_judge_batch
+run the same judging through the OpenAI Batch API for offline flows (half price,
+up to 24h turnaround).
 generate_feedback_and_questions aggregates deck-level advice and Q&A.
 """
 
-import json
+import asyncio
+import hashlib
+import heapq
+import io
 import logging
+import math
 import base64
+import os
+import statistics
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Set, Tuple, Optional
 
-from .openai_client import client
+import orjson
+
+from app.core.paths import ARTIFACTS_DIR, ROOT
+
+from . import llm_schemas
+from . import llm_cache
+from .llm_cache import acomplete, complete
+from .openai_client import get_batch_client, get_chat_aclient, get_chat_client, run_async
 import re
 
+
+_log = logging.getLogger(__name__)
+
+# Model per task. Any entry can be overridden with PP_MODEL_<TASK>, e.g.
+# PP_MODEL_REFORMAT=openai/gpt-4.1-nano, to A/B a cheaper tier.
+# "batch" goes to native OpenAI, so it takes an OpenAI (not OpenRouter) model id.
+MODELS: Dict[str, str] = {
+    "judge": "openai/gpt-4o-mini",       # slide/script vs speech alignment
+    "coach": "openai/gpt-4o-mini",       # feedback, script analysis
+    "reformat": "openai/gpt-4o-mini",    # template-following script review
+    "objections": "gpt-4o-mini",
+    "deck": "gpt-4o-mini",
+    "batch": "gpt-4o-mini",
+}
+
+
+def _model(task: str) -> str:
+    return os.getenv(f"PP_MODEL_{task.upper()}") or MODELS[task]
+
+
+def model_for(task: str) -> str:
+    """Model id a task runs on, after PP_MODEL_<TASK> overrides (for reports)."""
+    return _model(task)
+
+
+# Output token caps sized to each schema (generation time is linear in tokens)
+_JUDGE_TOKENS_PER_SLIDE = 220
+_MAX_TOKENS = {
+    "feedback": 1024,
+    "script_vs_speech": 512,
+    "script_quality": 768,
+    "script_meta": 900,
+    "objections": 1500,
+    "deck": 800,
+}
+_DECK_TOKENS_PER_SLIDE = 150
+
+
+# Per-call timeout: 30s covers the short replies; long outputs get ~50 tok/s
+_CALL_TIMEOUT_S = 30.0
+_CALL_TOKENS_PER_S = 50
+
+
+def _call_timeout(kwargs: Dict[str, Any]) -> float:
+    return max(_CALL_TIMEOUT_S, (kwargs.get("max_tokens") or 0) / _CALL_TOKENS_PER_S)
+
+
+def _json_retry(kwargs: Dict[str, Any], txt: str, err: Exception) -> Dict[str, Any]:
+    """Request kwargs for one repair attempt after an unparsable reply."""
+    retry = dict(kwargs)
+    retry["messages"] = [
+        *kwargs["messages"],
+        {"role": "assistant", "content": txt},
+        {"role": "user", "content": f"The reply was not valid JSON ({err}). Return the complete JSON only."},
+    ]
+    retry["temperature"] = 0.1
+    if kwargs.get("max_tokens"):
+        # Truncation is the usual cause; give the retry more room
+        retry["max_tokens"] = kwargs["max_tokens"] * 2
+        retry["timeout"] = _call_timeout(retry)
+    retry.pop("on_partial", None)
+    return retry
+
+
+def _is_json(txt: str) -> bool:
+    try:
+        _loads(txt)
+    except ValueError:
+        return False
+    return True
+
+
+def _cache_repaired(kwargs: Dict[str, Any], txt: str) -> None:
+    """Cache a repaired reply under the original request, so the next identical call hits."""
+    if not kwargs.get("no_cache") and _is_json(txt):
+        llm_cache.store({k: v for k, v in kwargs.items() if k not in ("no_cache", "on_partial")}, txt)
+
+
+def _complete_json(**kwargs: Any) -> str:
+    """complete() on the chat client, retried once with the parse error if the reply is not JSON.
+
+    Only parseable replies are cached. Transport errors and 429/5xx are
+    retried inside the SDK (max_retries).
+    """
+    kwargs.setdefault("timeout", _call_timeout(kwargs))
+    txt = complete(get_chat_client(), validate=_is_json, **kwargs)
+    try:
+        _loads(txt)
+    except ValueError as e:
+        txt = complete(get_chat_client(), validate=_is_json, **_json_retry(kwargs, txt, e))
+        _cache_repaired(kwargs, txt)
+    return txt
+
+
+async def _acomplete_json(**kwargs: Any) -> str:
+    """Async twin of _complete_json()."""
+    kwargs.setdefault("timeout", _call_timeout(kwargs))
+    txt = await acomplete(get_chat_aclient(), validate=_is_json, **kwargs)
+    try:
+        _loads(txt)
+    except ValueError as e:
+        txt = await acomplete(get_chat_aclient(), validate=_is_json, **_json_retry(kwargs, txt, e))
+        await asyncio.to_thread(_cache_repaired, kwargs, txt)
+    return txt
+
+
+_SLIDE_RE = re.compile(r"(?:slide|слайд)\s*(\d+)", re.IGNORECASE)
+_WS_RE = re.compile(r"\S+")
+
+
+_loads = orjson.loads
+
+
+def _dumps(obj: Any) -> str:
+    # orjson emits UTF-8 (no \u escapes) like json.dumps(ensure_ascii=False)
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
 def slice_transcript_by_datajson(full_text: str, data_json: Dict[str, Any]) -> Dict[int, str]:
     """Return mapping of slide index to transcript window.
 
@@ -25,7 +162,7 @@ def slice_transcript_by_datajson(full_text: str, data_json: Dict[str, Any]) -> D
         return {}
 
     # Tokenize transcript into words preserving simple whitespace separation
-    words = re.findall(r"\S+", full_text or "")
+    words = _WS_RE.findall(full_text or "")
     total_words = len(words)
     if total_words == 0:
         # Empty transcript → return empty windows for each slide
@@ -54,181 +191,662 @@ def slice_transcript_by_datajson(full_text: str, data_json: Dict[str, Any]) -> D
         except Exception:
             durations.append((idx, -1))
 
-    # Decide allocation strategy
-    allocations: Dict[int, int] = {}
-    if total_duration_ms > 0 and any(d >= 0 for _, d in durations):
-        # Proportional allocation by duration
-        remaining_words = total_words
-        remaining_ms = total_duration_ms
-        for i, (idx, dur) in enumerate(durations):
-            if dur <= 0:
-                allocations[idx] = 0
-                continue
-            if i == len(durations) - 1:
-                # assign all remaining to last with valid duration
-                allocations[idx] = remaining_words
-            else:
-                w = round(total_words * (dur / total_duration_ms))
-                w = max(0, min(remaining_words, w))
-                allocations[idx] = w
-                remaining_words -= w
-                remaining_ms -= dur
-        # if some words remain due to rounding and last had invalid duration, append to last slide overall
-        if sum(allocations.values()) < total_words:
-            last_key = durations[-1][0] if durations else None
-            if last_key is not None:
-                allocations[last_key] = allocations.get(last_key, 0) + (total_words - sum(allocations.values()))
+    import numpy as np
+
+    # Words per slide, then cumulative boundaries so each window is one slice
+    n = len(durations)
+    if n == 0:
+        return {}
+    if total_duration_ms > 0:
+        # Proportional allocation by duration; invalid durations get 0 words,
+        # and the last slide absorbs rounding drift
+        durs = np.fromiter((max(d, 0) for _, d in durations), dtype=np.float64, count=n)
+        alloc = np.rint(total_words * durs / total_duration_ms).astype(np.int64)
+        ends = np.minimum(np.cumsum(alloc), total_words)
     else:
         # Even split across slides
-        n = max(1, len(durations))
-        base = total_words // n
-        rem = total_words % n
-        for i, (idx, _) in enumerate(durations):
-            allocations[idx] = base + (1 if i < rem else 0)
+        base, rem = divmod(total_words, n)
+        alloc = np.full(n, base, dtype=np.int64)
+        alloc[:rem] += 1
+        ends = np.cumsum(alloc)
+    ends[-1] = total_words
+    starts = np.concatenate(([0], ends[:-1]))
 
     # Build text chunks in slide order (preserve given ordering)
-    chunks: Dict[int, str] = {}
-    cursor = 0
-    for idx, _ in durations:
-        take = max(0, int(allocations.get(idx, 0)))
-        if take <= 0:
-            chunks[idx] = ""
-            continue
-        segment = words[cursor : cursor + take]
-        chunks[idx] = " ".join(segment)
-        cursor += take
-    # Any leftover words (due to rounding) go to the last slide
-    if cursor < total_words and durations:
-        last_idx = durations[-1][0]
-        leftover = words[cursor:]
-        chunks[last_idx] = (chunks.get(last_idx, "") + (" " if chunks.get(last_idx) else "") + " ".join(leftover)).strip()
-    return chunks
+    return {
+        idx: " ".join(words[lo:hi]) if hi > lo else ""
+        for (idx, _), lo, hi in zip(durations, starts.tolist(), ends.tolist())
+    }
 
 
 
 
-def judge_slides_batched(
+# Max in-flight per-batch judge requests (provider RPM safety)
+_JUDGE_CONCURRENCY = max(1, int(os.getenv("JUDGE_CONCURRENCY", "8")))
+
+# Per-slide judge results keyed by sha256(image bytes, transcript window).
+# temperature=0, so re-runs and duplicate slides reuse the stored verdict.
+_SLIDE_CACHE_MAX = 10_000
+_slide_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_slide_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1024)
+def _file_digest(path_str: str, mtime_ns: int, size: int) -> bytes:
+    with open(path_str, "rb") as f:
+        return hashlib.file_digest(f, "sha256").digest()
+
+
+def _slide_cache_key(idx: int, transcript_text: str, image_path_by_index: Optional[Dict[int, Path]]) -> str:
+    h = hashlib.sha256()
+    img = image_path_by_index.get(idx) if image_path_by_index else None
+    if img is not None:
+        try:
+            st = os.stat(img)
+            h.update(_file_digest(str(img), st.st_mtime_ns, st.st_size))
+        except OSError:
+            pass
+    h.update(b"|")
+    h.update(transcript_text.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _slide_cache_get(key: str) -> Optional[Dict[str, Any]]:
+    with _slide_cache_lock:
+        hit = _slide_cache.get(key)
+        if hit is not None:
+            _slide_cache.move_to_end(key)
+        return hit
+
+
+def _slide_cache_put(key: str, result: Dict[str, Any]) -> None:
+    with _slide_cache_lock:
+        _slide_cache[key] = result
+        _slide_cache.move_to_end(key)
+        while len(_slide_cache) > _SLIDE_CACHE_MAX:
+            _slide_cache.popitem(last=False)
+
+
+# Upper bound on transcript words sent per slide. Windows are already a
+# proportional slice of the talk, but a slide held for most of it (or decks
+# without timings) would otherwise put most of the transcript in one prompt.
+_WINDOW_MAX_WORDS = 600
+
+
+def _judge_window(text: str, max_words: int = _WINDOW_MAX_WORDS) -> str:
+    """Transcript window capped to max_words, keeping its head and tail."""
+    words = text.split()
+    if len(words) <= max_words:
+        return text
+    head = max_words * 2 // 3
+    return " ".join(words[:head]) + " … " + " ".join(words[len(words) - (max_words - head):])
+
+
+# Slide renders are sent downscaled: the judge only needs layout and legible
+# text, and 1024px keeps vision-token cost and upload size low.
+_IMAGE_MAX_DIM = 1024
+_IMAGE_JPEG_QUALITY = 80
+# Encoded JPEGs persist across restarts, keyed by source path/version
+_IMAGE_CACHE_DIR = ROOT / ".cache" / "judge-images"
+# When the app is reachable from the provider (e.g. https://pitch.example.com),
+# slide images under /artifacts are sent by URL instead of inline base64
+_PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+
+
+def _jpeg_bytes(path_str: str, max_dim: int) -> bytes:
+    from PIL import Image
+
+    with Image.open(path_str) as img:
+        img.thumbnail((max_dim, max_dim))
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=_IMAGE_JPEG_QUALITY, optimize=True)
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=256)
+def _encode_image_cached(path_str: str, mtime_ns: int, size: int, max_dim: int) -> str:
+    name = hashlib.blake2b(
+        f"{path_str}|{mtime_ns}|{size}|{max_dim}|{_IMAGE_JPEG_QUALITY}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+    cached = _IMAGE_CACHE_DIR / f"{name}.jpg"
+    try:
+        data = cached.read_bytes()
+    except OSError:
+        data = _jpeg_bytes(path_str, max_dim)
+        try:
+            _IMAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, cached)
+        except OSError:
+            pass
+    return "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")
+
+
+def _public_image_url(path: Path, st: os.stat_result) -> Optional[str]:
+    """Versioned public /artifacts URL for path, or None if not configured or not an artifact."""
+    if not _PUBLIC_BASE_URL:
+        return None
+    try:
+        rel = Path(path).resolve().relative_to(ARTIFACTS_DIR.resolve())
+    except ValueError:
+        return None
+    # Same ?v= scheme as the slides router, so the provider can cache by URL
+    return f"{_PUBLIC_BASE_URL}/artifacts/{rel.as_posix()}?v={st.st_mtime_ns:x}"
+
+
+def _encode_image(path: Path, max_dim: int = _IMAGE_MAX_DIM) -> Optional[str]:
+    """Image URL for a slide: public URL if available, else a downscaled JPEG data URI.
+
+    None if the image cannot be read.
+    """
+    try:
+        st = os.stat(path)
+        return _public_image_url(path, st) or _encode_image_cached(str(path), st.st_mtime_ns, st.st_size, max_dim)
+    except Exception:
+        return None
+
+
+_EMPTY_VERDICT: Dict[str, Any] = {
+    "similarity_0_1": 0.0,
+    "judgement": "",
+    "missing_points": [],
+    "hallucinated_points": [],
+    "evidence": [],
+}
+
+
+def _has_judge_input(
+    idx: int,
+    index_to_transcript: Dict[int, str],
+    image_path_by_index: Optional[Dict[int, Path]],
+) -> bool:
+    if (index_to_transcript.get(idx) or "").strip():
+        return True
+    return bool(image_path_by_index) and idx in image_path_by_index
+
+
+# Fixed instructions live in the system prompt so the prompt prefix is
+# identical across batches (provider-side prompt caching)
+_JUDGE_SYSTEM = (
+    "You are a rigorous presentation reviewer. "
+    "Judge alignment between the slide IMAGE and what the speaker says. "
+    "Each slide is given as [SLIDE i], its image (if available) and its [TRANSCRIPT_WINDOW]. "
+    "For each slide, return: similarity_0_1 (0..1), judgement (RU, 1-2 sentences), "
+    "missing_points[], hallucinated_points[], evidence[]. "
+    "Return {\"per_slide\":[{index, similarity_0_1, judgement, missing_points, hallucinated_points, evidence}]}, "
+    "preserving input order by slide index. "
+    "Output strictly valid JSON only."
+)
+
+
+def _encode_images(
+    indices: List[int],
+    image_path_by_index: Optional[Dict[int, Path]],
+) -> Dict[int, str]:
+    """{index: data URI} for the slides that have a readable image."""
+    if not image_path_by_index:
+        return {}
+    uris = {idx: _encode_image(image_path_by_index[idx]) for idx in indices if idx in image_path_by_index}
+    return {idx: uri for idx, uri in uris.items() if uri}
+
+
+async def _aencode_images(
+    indices: List[int],
+    image_path_by_index: Optional[Dict[int, Path]],
+) -> Dict[int, str]:
+    """_encode_images with one worker thread per image (Pillow releases the GIL)."""
+    if not image_path_by_index:
+        return {}
+    todo = [idx for idx in indices if idx in image_path_by_index]
+    uris = await asyncio.gather(*(asyncio.to_thread(_encode_image, image_path_by_index[idx]) for idx in todo))
+    return {idx: uri for idx, uri in zip(todo, uris) if uri}
+
+
+def _slide_msgs(
+    sl: Dict[str, Any],
+    index_to_transcript: Dict[int, str],
+    image_uri_by_index: Dict[int, str],
+) -> List[Dict[str, Any]]:
+    """User-content parts for one slide: marker, optional image, transcript window."""
+    idx = sl["index"]
+    parts: List[Dict[str, Any]] = [{"type": "text", "text": f"[SLIDE {idx}]"}]
+    data_uri = image_uri_by_index.get(idx)
+    if data_uri:
+        parts.append({"type": "image_url", "image_url": {"url": data_uri}})
+    parts.append({"type": "text", "text": "[TRANSCRIPT_WINDOW]\n" + _judge_window(index_to_transcript.get(idx, ""))})
+    return parts
+
+
+def _judge_batch_messages(
+    batch: List[Dict[str, Any]],
+    index_to_transcript: Dict[int, str],
+    image_uri_by_index: Dict[int, str],
+) -> List[Dict[str, Any]]:
+    # Variable content only: text + optional image for each slide
+    user_content = [m for sl in batch for m in _slide_msgs(sl, index_to_transcript, image_uri_by_index)]
+    return [
+        {"role": "system", "content": [{"type": "text", "text": _JUDGE_SYSTEM}]},
+        {"role": "user", "content": user_content},
+    ]
+
+
+def _parse_judge_batch(txt: str) -> List[Dict[str, Any]]:
+    try:
+        parsed = _loads(txt)
+        return parsed.get("per_slide", [])
+    except Exception:
+        return []
+
+
+def _title_by_index(slides: List[Dict[str, Any]]) -> Dict[int, str]:
+    return {sl["index"]: sl.get("title", f"Slide {sl['index']}") for sl in slides}
+
+
+# Adaptive batching: spread the deck over about one wave of concurrent
+# requests, but keep each prompt within a token and image budget
+_BATCH_TOKEN_BUDGET = 24_000
+_BATCH_MAX_IMAGES = 8
+_BATCH_MAX_SLIDES = 12
+# 1024px high-detail image: 85 base + 4 tiles x 170
+_IMAGE_TOKENS = 765
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Any:
+    """o200k_base tokenizer (gpt-4o family), or None without tiktoken."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+# ~4 chars per token for mixed RU/EN prose is close enough without a tokenizer
+_CHARS_PER_TOKEN = 4
+
+
+def _token_counter() -> Callable[[str], int]:
+    enc = _encoding()
+    if enc is None:
+        return lambda text: len(text) // _CHARS_PER_TOKEN + 1
+    return lambda text: len(enc.encode(text))
+
+
+@lru_cache(maxsize=32)
+def truncate_by_tokens(text: str, max_tokens: int = 3000) -> str:
+    """Leading part of text that fits in max_tokens prompt tokens.
+
+    Cached, so several LLM calls over the same transcript tokenize it once.
+    """
+    enc = _encoding()
+    if enc is None:
+        return text[: max_tokens * _CHARS_PER_TOKEN]
+    tokens = enc.encode(text)
+    return text if len(tokens) <= max_tokens else enc.decode(tokens[:max_tokens])
+
+
+def _slide_tokens(idx: int, index_to_transcript: Dict[int, str], image_uri_by_index: Dict[int, str]) -> int:
+    tokens = _token_counter()(_judge_window(index_to_transcript.get(idx, ""))) + 16
+    if idx in image_uri_by_index:
+        tokens += _IMAGE_TOKENS
+    return tokens
+
+
+def _pack_batches(
     slides: List[Dict[str, Any]],
     index_to_transcript: Dict[int, str],
-    batch_size: int = 3,
-    image_path_by_index: Optional[Dict[int, Path]] = None,
+    image_uri_by_index: Dict[int, str],
+) -> List[List[Dict[str, Any]]]:
+    """Greedily pack slides (in order) into batches bounded by token/image budgets."""
+    if not slides:
+        return []
+    target = min(_BATCH_MAX_SLIDES, max(1, math.ceil(len(slides) / _JUDGE_CONCURRENCY)))
+    batches: List[List[Dict[str, Any]]] = []
+    cur: List[Dict[str, Any]] = []
+    cur_tokens = cur_images = 0
+    for sl in slides:
+        idx = sl["index"]
+        tokens = _slide_tokens(idx, index_to_transcript, image_uri_by_index)
+        images = 1 if idx in image_uri_by_index else 0
+        if cur and (
+            len(cur) >= target
+            or cur_tokens + tokens > _BATCH_TOKEN_BUDGET
+            or cur_images + images > _BATCH_MAX_IMAGES
+        ):
+            batches.append(cur)
+            cur, cur_tokens, cur_images = [], 0, 0
+        cur.append(sl)
+        cur_tokens += tokens
+        cur_images += images
+    batches.append(cur)
+    return batches
+
+
+async def _ajudge_batch(
+    batch: List[Dict[str, Any]],
+    index_to_transcript: Dict[int, str],
+    image_uri_by_index: Dict[int, str],
+    sem: asyncio.Semaphore,
+    no_cache: bool = False,
+    on_item: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> List[Dict[str, Any]]:
-    results: List[Dict[str, Any]] = []
-    for i in range(0, len(slides), batch_size):
-        batch = slides[i : i + batch_size]
-
-        system = (
-            "You are a rigorous presentation reviewer. "
-            "Return strictly valid JSON with per_slide results. "
-            "Judge alignment between the slide IMAGE and what the speaker says. "
-            "Output strictly valid JSON only."
-        )
+    messages = _judge_batch_messages(batch, index_to_transcript, image_uri_by_index)
 
-        # Build multimodal message content: text + optional image for each slide
-        user_content: List[Dict[str, Any]] = []
-        for sl in batch:
-            idx = sl["index"]
-            transcript_text = index_to_transcript.get(idx, "")
-            user_content.append({"type": "text", "text": f"[SLIDE {idx}]"})
+    on_partial = None
+    if on_item is not None:
+        seen = 0
 
-            if image_path_by_index and idx in image_path_by_index and image_path_by_index[idx].exists():
-                try:
-                    b = image_path_by_index[idx].read_bytes()
-                    b64 = base64.b64encode(b).decode("ascii")
-                    data_uri = f"data:image/png;base64,{b64}"
-                    user_content.append({"type": "image_url", "image_url": {"url": data_uri}})
-                except Exception:
-                    pass
-
-            instruct = (
-                "[TRANSCRIPT_WINDOW]\n" + transcript_text +
-                "\n[INSTRUCTIONS]\nFor this slide, return JSON with keys: "
-                "similarity_0_1 (0..1), judgement (RU, 1-2 sentences), missing_points[], hallucinated_points[], evidence[]."
-            )
-            user_content.append({"type": "text", "text": instruct})
-
-        # Final instruction: aggregate
-        user_content.append({"type": "text", "text": "Return {\"per_slide\":[{index, similarity_0_1, judgement, missing_points, hallucinated_points, evidence}]}, preserving input order by slide index."})
-
-        resp = client.chat.completions.create(
-            model="openai/gpt-4o-mini",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": [{"type": "text", "text": system}]},
-                {"role": "user", "content": user_content},
-            ],
+        def _emit_closed(doc: Any) -> None:
+            # Every per_slide item but the last one in a partial parse is closed
+            nonlocal seen
+            items = doc.get("per_slide") if isinstance(doc, dict) else None
+            if not isinstance(items, list):
+                return
+            for item in items[seen : len(items) - 1]:
+                on_item(item)
+            seen = max(seen, len(items) - 1)
+
+        on_partial = _emit_closed
+
+    async with sem:
+        txt = await _acomplete_json(
+            no_cache=no_cache,
+            on_partial=on_partial,
+            model=_model("judge"),
+            response_format=llm_schemas.PER_SLIDE_JUDGE,
+            max_tokens=_JUDGE_TOKENS_PER_SLIDE * len(batch) + 64,
+            messages=messages,
             temperature=0,
         )
+    return _parse_judge_batch(txt)
+
+
+async def ajudge_slides_batched(
+    slides: List[Dict[str, Any]],
+    index_to_transcript: Dict[int, str],
+    batch_size: Optional[int] = None,
+    image_path_by_index: Optional[Dict[int, Path]] = None,
+    no_cache: bool = False,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Judge all batches concurrently (bounded by _JUDGE_CONCURRENCY); results keep input order.
+
+    on_result, if given, receives each slide's verdict as soon as it is known
+    (batches are then streamed and verdicts emitted as their JSON objects
+    close); it runs on the client event loop and must not block.
+
+    batch_size=None packs slides by token budget (see _pack_batches); an int
+    keeps fixed-size batches. Slides already judged with the same image and transcript window are served
+    from the in-process cache; only the misses are sent to the model.
+    no_cache=True bypasses both caches.
+    """
+    title_by_index = _title_by_index(slides)
+    emitted: Set[int] = set()
+
+    def _emit(r: Dict[str, Any]) -> None:
+        idx = r.get("index")
+        if on_result is None or idx not in title_by_index or idx in emitted:
+            return
+        emitted.add(idx)
+        on_result({**r, "slide_title": title_by_index[idx]})
+
+    keys: Dict[int, str] = {}
+    cached: Dict[int, Dict[str, Any]] = {}
+    misses: List[Dict[str, Any]] = []
+    # Repeated slides (same image and narration, e.g. section separators) are
+    # judged once; the other occurrences reuse that verdict
+    first_by_key: Dict[str, int] = {}
+    # Hash slide images in parallel threads (file reads release the GIL)
+    slide_keys = await asyncio.gather(*(
+        asyncio.to_thread(_slide_cache_key, sl["index"], index_to_transcript.get(sl["index"], ""), image_path_by_index)
+        for sl in slides
+    ))
+    for sl, key in zip(slides, slide_keys):
+        idx = sl["index"]
+        keys[idx] = key
+        hit = None if no_cache else _slide_cache_get(key)
+        if hit is None and not _has_judge_input(idx, index_to_transcript, image_path_by_index):
+            # Nothing to compare: score it locally instead of paying for a call
+            hit = _EMPTY_VERDICT
+        if hit is not None:
+            cached[idx] = {**hit, "index": idx, "slide_title": title_by_index[idx]}
+            _emit(cached[idx])
+        elif key not in first_by_key:
+            first_by_key[key] = idx
+            misses.append(sl)
+
+    fresh: Dict[int, Dict[str, Any]] = {}
+    if misses:
+        # Encode every image that will be sent up front, all in parallel, so
+        # building batch requests does no disk or image work
+        uris = await _aencode_images([sl["index"] for sl in misses], image_path_by_index)
+        sem = asyncio.Semaphore(_JUDGE_CONCURRENCY)
+        if batch_size:
+            batches = [misses[i : i + batch_size] for i in range(0, len(misses), batch_size)]
+        else:
+            batches = _pack_batches(misses, index_to_transcript, uris)
+        per_batch = await asyncio.gather(
+            *(_ajudge_batch(b, index_to_transcript, uris, sem, no_cache, _emit if on_result else None)
+              for b in batches),
+            return_exceptions=True,
+        )
+        # A failed batch only drops its own slides; fail the call if nothing succeeded
+        errors = [r for r in per_batch if isinstance(r, BaseException)]
+        if errors and len(errors) == len(per_batch):
+            raise errors[0]
+        for batch, batch_results in zip(batches, per_batch):
+            if isinstance(batch_results, BaseException):
+                _log.warning(
+                    "judge_batch_failed",
+                    extra={"slides": [sl["index"] for sl in batch], "error": repr(batch_results)},
+                )
+                continue
+            for r in batch_results:
+                idx = r.get("index")
+                if idx in keys and idx not in fresh and idx not in cached:
+                    _slide_cache_put(keys[idx], dict(r))
+                    r["slide_title"] = title_by_index[idx]
+                    fresh[idx] = r
+                    _emit(r)
+
+    _log.info(
+        "judge_slides_cache",
+        extra={"slides": len(slides), "cache_hits": len(cached), "sent": len(misses)},
+    )
+    out: List[Dict[str, Any]] = []
+    for sl in slides:
+        idx = sl["index"]
+        r = cached.get(idx) or fresh.get(idx)
+        if r is None:
+            first = fresh.get(first_by_key.get(keys[idx], idx))
+            if first is not None:
+                r = {**first, "index": idx, "slide_title": title_by_index[idx]}
+                _emit(r)
+        if r is not None:
+            out.append(r)
+    return out
 
-        txt = (resp.choices[0].message.content or "").strip()
+
+def judge_slides_batched(
+    slides: List[Dict[str, Any]],
+    index_to_transcript: Dict[int, str],
+    batch_size: Optional[int] = None,
+    image_path_by_index: Optional[Dict[int, Path]] = None,
+    no_cache: bool = False,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Sync facade over ajudge_slides_batched for pipeline threads."""
+    return run_async(
+        ajudge_slides_batched(slides, index_to_transcript, batch_size, image_path_by_index, no_cache, on_result)
+    )
+
+
+def submit_judge_batch(
+    slides: List[Dict[str, Any]],
+    index_to_transcript: Dict[int, str],
+    image_path_by_index: Optional[Dict[int, Path]] = None,
+) -> str:
+    """Queue per-slide judging as an OpenAI Batch job; returns the batch id.
+
+    One request per slide (custom_id "slide-<index>"). Not for interactive use:
+    results arrive within the 24h completion window, see collect_judge_batch.
+    """
+    lines: List[bytes] = []
+    uris = _encode_images([sl["index"] for sl in slides], image_path_by_index)
+    for sl in slides:
+        body = {
+            "model": _model("batch"),
+            "response_format": llm_schemas.PER_SLIDE_JUDGE,
+            "max_tokens": _JUDGE_TOKENS_PER_SLIDE + 64,
+            "messages": _judge_batch_messages([sl], index_to_transcript, uris),
+            "temperature": 0,
+        }
+        lines.append(orjson.dumps({
+            "custom_id": f"slide-{sl['index']}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": body,
+        }))
+    payload = b"\n".join(lines) + b"\n"
+
+    batch_client = get_batch_client()
+    batch_file = batch_client.files.create(file=("judge.jsonl", payload), purpose="batch")
+    batch = batch_client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    _log.info("judge batch submitted", extra={"batch_id": batch.id, "slides": len(slides)})
+    return batch.id
+
+
+def collect_judge_batch(batch_id: str, slides: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """Return per-slide results of a finished judge batch, or None while it is still running.
+
+    Output matches judge_slides_batched (ordered by input slides); slides whose
+    request failed are omitted. Raises RuntimeError if the batch failed/expired.
+    """
+    batch_client = get_batch_client()
+    batch = batch_client.batches.retrieve(batch_id)
+    if batch.status in ("failed", "expired", "cancelled"):
+        raise RuntimeError(f"judge batch {batch_id} {batch.status}")
+    if batch.status != "completed":
+        return None
+    if not batch.output_file_id:
+        return []
+
+    by_index: Dict[int, List[Dict[str, Any]]] = {}
+    title_by_index = _title_by_index(slides)
+    # Parse the JSONL bytes directly; orjson takes bytes without a decode pass
+    content = batch_client.files.content(batch.output_file_id).content
+    for line in content.splitlines():
+        if not line.strip():
+            continue
         try:
-            parsed = json.loads(txt)
-            batch_results = parsed.get("per_slide", [])
+            item = _loads(line)
+            idx = int(item["custom_id"].split("-", 1)[1])
+            txt = item["response"]["body"]["choices"][0]["message"]["content"] or ""
         except Exception:
-            batch_results = []
+            continue
+        if idx in title_by_index:
+            results = _parse_judge_batch(txt.strip())
+            for r in results:
+                r["slide_title"] = title_by_index.get(r.get("index"), "")
+            by_index[idx] = results
+
+    return [r for sl in slides for r in by_index.get(sl["index"], [])]
+
+
+_FEEDBACK_BOTTOM_K = 10
+
+
+def _similarity_summary(sims: List[float]) -> Dict[str, Any]:
+    if not sims:
+        return {"slides": 0}
+    p25, p50, _ = statistics.quantiles(sims, n=4) if len(sims) > 1 else (sims[0],) * 3
+    return {
+        "slides": len(sims),
+        "mean": round(statistics.fmean(sims), 3),
+        "p25": round(p25, 3),
+        "p50": round(p50, 3),
+        "below_0_5": sum(1 for x in sims if x < 0.5),
+    }
 
-        title_by_index = {sl["index"]: sl.get("title", f"Slide {sl['index']}") for sl in batch}
-        for r in batch_results:
-            r["slide_title"] = title_by_index.get(r.get("index"), "")
-        results.extend(batch_results)
 
-    return results
+_FEEDBACK_SYSTEM = (
+    "You are a senior coach for public speaking. Be concise, actionable, and specific. "
+    "Given the [CONTEXT]: 1) Summarize 5–8 concrete improvements (Russian). "
+    "2) Generate 5 investor, 5 tech, 5 product challenge questions, referencing slide numbers where relevant. "
+    "Return JSON: { \"improvements\": [str], \"questions\": {\"investor\":[str], \"tech\":[str], \"product\":[str]} }. "
+    "Output strictly valid JSON only."
+)
 
 
 def generate_feedback_and_questions(
     weak_slides: List[int],
     deck_metrics: Dict[str, Any],
     per_slide: List[Dict[str, Any]],
+    no_cache: bool = False,
+    on_partial: Optional[Callable[[Any], None]] = None,
 ) -> Tuple[List[str], Dict[str, List[Dict[str, Any]]]]:
-    """Generate actionable improvements and role-based questions via LLM."""
-    system = (
-        "You are a senior coach for public speaking. Be concise, actionable, and specific. "
-        "Output strictly valid JSON only."
-    )
+    """Generate actionable improvements and role-based questions via LLM.
+
+    on_partial, if given, streams the reply and receives the partially parsed JSON.
+    """
+    # Only the weakest slides' judgements go into the prompt; the rest of the
+    # deck is summarized by similarity statistics
+    def _sim(r: Dict[str, Any]) -> float:
+        try:
+            return float(r.get("similarity_0_1") or 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    weakest = heapq.nsmallest(_FEEDBACK_BOTTOM_K, per_slide, key=_sim)
     context = {
         "weak_slides": weak_slides,
         "style_issues": deck_metrics,
-        "per_slide_similarities": [
+        "weakest_slide_similarities": [
             {
                 "index": r.get("index"),
                 "similarity_0_1": r.get("similarity_0_1", 0.0),
                 "judgement": r.get("judgement", ""),
             }
-            for r in per_slide
+            for r in weakest
         ],
+        "similarity_summary": _similarity_summary([_sim(r) for r in per_slide]),
     }
-    user = (
-        "[CONTEXT]\n" + json.dumps(context, ensure_ascii=False) +
-        "\n[TASK]\n1) Summarize 5–8 concrete improvements (Russian).\n"
-        "2) Generate 5 investor, 5 tech, 5 product challenge questions, referencing slide numbers where relevant.\n"
-        "Return JSON: { \"improvements\": [str], \"questions\": {\"investor\":[str], \"tech\":[str], \"product\":[str]} }"
-    )
+    user = "[CONTEXT]\n" + _dumps(context)
 
-    resp = client.chat.completions.create(
-        model="openai/gpt-4o-mini",
-        response_format={"type": "json_object"},
+    txt = _complete_json(
+        no_cache=no_cache,
+        on_partial=on_partial,
+        model=_model("coach"),
+        response_format=llm_schemas.FEEDBACK,
+        max_tokens=_MAX_TOKENS["feedback"],
         messages=[
-            {"role": "system", "content": system},
+            {"role": "system", "content": _FEEDBACK_SYSTEM},
             {"role": "user", "content": user},
         ],
         temperature=0,
     )
-
-    txt = (resp.choices[0].message.content or "").strip()
     try:
-        parsed = json.loads(txt)
+        parsed = _loads(txt)
         improvements = parsed.get("improvements", [])
         qs = parsed.get("questions", {})
     except Exception:
         improvements = []
         qs = {"investor": [], "tech": [], "product": []}
-    logging.getLogger(__name__).info("judge_feedback_questions", extra={"improvements": len(improvements), "q_investor": len(qs.get("investor", [])), "q_tech": len(qs.get("tech", [])), "q_product": len(qs.get("product", []))})
+    _log.info("judge_feedback_questions", extra={"improvements": len(improvements), "q_investor": len(qs.get("investor", [])), "q_tech": len(qs.get("tech", [])), "q_product": len(qs.get("product", []))})
 
     def _wrap_questions(lst: List[str]) -> List[Dict[str, Any]]:
         out: List[Dict[str, Any]] = []
         for q in lst:
             slide_num = None
-            m = re.search(r"(?:slide|слайд)\s*(\d+)", q, flags=re.IGNORECASE)
+            m = _SLIDE_RE.search(q)
             if m:
                 try:
                     slide_num = int(m.group(1))
@@ -245,67 +863,86 @@ def generate_feedback_and_questions(
     return improvements[:8], questions_struct
 
 
-def judge_script_vs_speech(script_text: str, transcript_text: str) -> Dict[str, Any]:
+_SCRIPT_VS_SPEECH_SYSTEM = (
+    "You are a rigorous reviewer. Output strictly valid JSON. "
+    "Compare intended script to spoken transcript and assess alignment. "
+    "Return JSON: {\"similarity_0_1\": float, \"notes\": str, \"missing_points\": [str], \"added_points\": [str]}"
+)
+
+
+def judge_script_vs_speech(script_text: str, transcript_text: str, no_cache: bool = False) -> Dict[str, Any]:
     """Compare provided script (Word text) against spoken transcript.
 
     Returns JSON with similarity, omissions, additions, and brief notes.
     """
-    system = (
-        "You are a rigorous reviewer. Output strictly valid JSON. "
-        "Compare intended script to spoken transcript and assess alignment."
-    )
-    user = (
-        "[SCRIPT]\n" + script_text +
-        "\n[TRANSCRIPT]\n" + transcript_text +
-        "\n[INSTRUCTIONS]\nReturn JSON: {\"similarity_0_1\": float, \"notes\": str, \"missing_points\": [str], \"added_points\": [str]}"
-    )
-    resp = client.chat.completions.create(
-        model="openai/gpt-4o-mini",
-        response_format={"type": "json_object"},
+    if not (script_text or "").strip() or not (transcript_text or "").strip():
+        return {"similarity_0_1": 0.0, "notes": "", "missing_points": [], "added_points": []}
+    user = "[SCRIPT]\n" + script_text + "\n[TRANSCRIPT]\n" + transcript_text
+    txt = _complete_json(
+        no_cache=no_cache,
+        model=_model("judge"),
+        response_format=llm_schemas.SCRIPT_VS_SPEECH,
+        max_tokens=_MAX_TOKENS["script_vs_speech"],
         messages=[
-            {"role": "system", "content": system},
+            {"role": "system", "content": _SCRIPT_VS_SPEECH_SYSTEM},
             {"role": "user", "content": user},
         ],
         temperature=0,
     )
-    txt = (resp.choices[0].message.content or "").strip()
     try:
-        return json.loads(txt)
+        return _loads(txt)
     except Exception:
         return {"similarity_0_1": 0.0, "notes": "", "missing_points": [], "added_points": []}
 
 
-def review_script_quality(script_text: str) -> Dict[str, Any]:
+_SCRIPT_QUALITY_SYSTEM = (
+    "You are a senior editor for public speaking scripts. Output strictly valid JSON. "
+    "Return JSON: {\"issues\":[str], \"suggestions\":[str], \"overall\": str}"
+)
+
+
+def review_script_quality(script_text: str, no_cache: bool = False) -> Dict[str, Any]:
     """Assess the quality of the provided script (clarity, structure, errors)."""
-    system = (
-        "You are a senior editor for public speaking scripts. Output strictly valid JSON."
-    )
-    user = (
-        "[SCRIPT]\n" + script_text +
-        "\n[INSTRUCTIONS]\nReturn JSON: {\"issues\":[str], \"suggestions\":[str], \"overall\": str}"
-    )
-    resp = client.chat.completions.create(
-        model="openai/gpt-4o-mini",
-        response_format={"type": "json_object"},
+    if not (script_text or "").strip():
+        return {"issues": [], "suggestions": [], "overall": ""}
+    user = "[SCRIPT]\n" + script_text
+    txt = _complete_json(
+        no_cache=no_cache,
+        model=_model("reformat"),
+        response_format=llm_schemas.SCRIPT_QUALITY,
+        max_tokens=_MAX_TOKENS["script_quality"],
         messages=[
-            {"role": "system", "content": system},
+            {"role": "system", "content": _SCRIPT_QUALITY_SYSTEM},
             {"role": "user", "content": user},
         ],
         temperature=0,
     )
-    txt = (resp.choices[0].message.content or "").strip()
     try:
-        return json.loads(txt)
+        return _loads(txt)
     except Exception:
         return {"issues": [], "suggestions": [], "overall": ""}
 
 
-def analyze_script_with_meta(script_text: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+_ANALYZE_SYSTEM = (
+    "You are a senior Russian-speaking editor and public speaking coach. "
+    "Evaluate the script with respect to user's context (goal, direction, audience, format, experience, notes). "
+    "Assess quality and alignment. Score from 0 to 100 (integer). "
+    "Give 5–10 concise recommendations in Russian (short actionable sentences), "
+    "and mark each recommendation with importance: 1 = highly important, 0 = important. "
+    "Generate 3–7 thesis bullet points in Russian (max 12 words each). "
+    "Return JSON: {\"score_0_100\": int, \"recommendations\":[{\"text\": str, \"important\": 0|1}], \"thesis\":[str]}. "
+    "Return strictly valid JSON only."
+)
+
+
+def analyze_script_with_meta(script_text: str, meta: Dict[str, Any], no_cache: bool = False) -> Dict[str, Any]:
     """
     Analyze the provided script text taking into account user's intent meta
     (goal, audience, format, experience). Returns strictly structured JSON:
     {"score_0_100": int, "recommendations": [{"text": str, "important": 0|1}], "thesis": [str]}
     """
+    if not (script_text or "").strip():
+        return {"score_0_100": 0, "recommendations": [], "thesis": []}
     goal = meta.get("goal") or meta.get("goal_other") or ""
     audience = meta.get("audience") or ""
     fmt = meta.get("format") or ""
@@ -314,12 +951,6 @@ def analyze_script_with_meta(script_text: str, meta: Dict[str, Any]) -> Dict[str
     direction = meta.get("direction") or ""
     notes = meta.get("notes") or ""
 
-    system = (
-        "You are a senior Russian-speaking editor and public speaking coach. "
-        "Evaluate the script with respect to user's context (goal, direction, audience, format, experience, notes). "
-        "Return strictly valid JSON only."
-    )
-
     meta_blob = {
         "goal": goal,
         "direction": direction,
@@ -330,60 +961,55 @@ def analyze_script_with_meta(script_text: str, meta: Dict[str, Any]) -> Dict[str
         "notes": notes,
     }
     user = (
-        "[META]\n" + json.dumps(meta_blob, ensure_ascii=False) +
-        "\n[SCRIPT]\n" + (script_text or "") +
-        "\n[INSTRUCTIONS]\n"
-        "Assess quality and alignment. Score from 0 to 100 (integer). "
-        "Give 5–10 concise recommendations in Russian (short actionable sentences), "
-        "and mark each recommendation with importance: 1 = highly important, 0 = important. "
-        "Generate 3–7 thesis bullet points in Russian (max 12 words each). "
-        "Return JSON: {\"score_0_100\": int, \"recommendations\":[{\"text\": str, \"important\": 0|1}], \"thesis\":[str]}"
+        "[META]\n" + _dumps(meta_blob) +
+        "\n[SCRIPT]\n" + (script_text or "")
     )
 
-    resp = client.chat.completions.create(
-        model="openai/gpt-4o-mini",
-        response_format={"type": "json_object"},
+    txt = _complete_json(
+        no_cache=no_cache,
+        model=_model("coach"),
+        response_format=llm_schemas.SCRIPT_META,
+        max_tokens=_MAX_TOKENS["script_meta"],
         messages=[
-            {"role": "system", "content": system},
+            {"role": "system", "content": _ANALYZE_SYSTEM},
             {"role": "user", "content": user},
         ],
         temperature=0,
     )
-
-    txt = (resp.choices[0].message.content or "").strip()
     try:
-        parsed = json.loads(txt)
-        # sanitize
-        score = parsed.get("score_0_100")
-        try:
-            score = int(score)
-        except Exception:
-            score = 0
-        score = max(0, min(100, score))
-
-        raw_recs = parsed.get("recommendations") or []
-        recs_out: List[Dict[str, Any]] = []
-        for item in raw_recs[:10]:
-            try:
-                text_val = str(item.get("text", "")).strip()
-                imp_val = item.get("important", 0)
-                try:
-                    imp_int = int(imp_val)
-                except Exception:
-                    imp_int = 0
-                imp_int = 1 if imp_int == 1 else 0
-                if text_val:
-                    recs_out.append({"text": text_val, "important": imp_int})
-            except Exception:
-                continue
+        parsed = _loads(txt)
+        # Types/enums are enforced by the schema; only the range is not
+        score = max(0, min(100, int(parsed["score_0_100"])))
+        recs_out: List[Dict[str, Any]] = [
+            {"text": text_val, "important": item["important"]}
+            for item in parsed["recommendations"][:10]
+            if (text_val := item["text"].strip())
+        ]
 
         thesis = [str(x) for x in (parsed.get("thesis") or [])][:10]
-        logging.getLogger(__name__).info("analyze_script", extra={"score": score, "recs": len(recs_out), "thesis": len(thesis)})
+        _log.info("analyze_script", extra={"score": score, "recs": len(recs_out), "thesis": len(thesis)})
         return {"score_0_100": score, "recommendations": recs_out, "thesis": thesis}
     except Exception:
         return {"score_0_100": 0, "recommendations": [], "thesis": []}
 
 
+_OBJECTIONS_SYSTEM = (
+    "You are a Russian-speaking role-play coach for objection handling. "
+    "Use the provided transcript to craft SPECIFIC, contextual questions. "
+    "For each role, generate ONE concise but challenging question grounded in what the speaker actually said. "
+    "Include a short quote/paraphrase from the transcript as evidence. If slides are not provided, set slide to null. "
+    "Return three roles relevant to the [CONTEXT] (e.g., Инвестор, Техдиректор, Клиент). "
+    "For EACH role, generate ONE specific, CHALLENGING question grounded strictly in the transcript, and THREE answer options: "
+    "1 correct (grade=good), 1 partially correct (grade=mid), 1 incorrect (grade=bad). "
+    "Provide a short supporting quote/paraphrase from the transcript. Set slide to null if unknown. "
+    "Strict format: {\"roles\":[{\"actor\":str, \"question\":str, \"slide\": int|null, \"quote\": str, \"options\":[{\"text\":str, \"grade\":\"good|mid|bad\", \"explanation\":str}]}]}. "
+    "Output strictly valid JSON only."
+)
+
+
+_OBJECTIONS_TRANSCRIPT_TOKENS = 3000
+
+
 def generate_objections_with_answers(
     transcript_text: str,
     meta: Dict[str, Any],
@@ -392,11 +1018,16 @@ def generate_objections_with_answers(
     deck_metrics: Optional[Dict[str, Any]] = None,
     per_slide_eval: Optional[List[Dict[str, Any]]] = None,
     weak_slides: Optional[List[int]] = None,
+    no_cache: bool = False,
+    on_partial: Optional[Callable[[Any], None]] = None,
 ) -> Dict[str, Any]:
     """Generate role-based questions using ONLY transcript and meta (no slides).
 
     Returns JSON: {"roles": [{"actor": str, "question": str, "slide": int|null, "quote": str, "options": [{"text": str, "grade": "good|mid|bad", "explanation": str}]}]}
+    on_partial, if given, streams the reply and receives the partially parsed JSON.
     """
+    if not (transcript_text or "").strip():
+        return {"roles": []}
     goal = meta.get("goal") or meta.get("goal_other") or ""
     audience = meta.get("audience") or ""
     fmt = meta.get("format") or ""
@@ -405,14 +1036,6 @@ def generate_objections_with_answers(
     direction = meta.get("direction") or ""
     notes = meta.get("notes") or ""
 
-    system = (
-        "You are a Russian-speaking role-play coach for objection handling. "
-        "Use the provided transcript to craft SPECIFIC, contextual questions. "
-        "For each role, generate ONE concise but challenging question grounded in what the speaker actually said. "
-        "Include a short quote/paraphrase from the transcript as evidence. If slides are not provided, set slide to null. "
-        "Output strictly valid JSON only."
-    )
-
     meta_blob = {
         "goal": goal,
         "direction": direction,
@@ -423,40 +1046,28 @@ def generate_objections_with_answers(
         "notes": notes,
     }
 
-    # Prepare transcript excerpt to keep prompt size reasonable
-    try:
-        words = re.findall(r"\S+", transcript_text or "")
-        transcript_short = " ".join(words[:1200])
-    except Exception:
-        transcript_short = str(transcript_text or "")[:12000]
-
     payload = {
         "meta": meta_blob,
-        "transcript": transcript_short,
+        # Bounded excerpt keeps the prompt size predictable
+        "transcript": truncate_by_tokens(transcript_text, _OBJECTIONS_TRANSCRIPT_TOKENS),
     }
 
-    user = (
-        "[CONTEXT]\n" + json.dumps(payload, ensure_ascii=False) +
-        "\n[TASK]\nReturn three roles relevant to the context (e.g., Инвестор, Техдиректор, Клиент). "
-        "For EACH role, generate ONE specific, CHALLENGING question grounded strictly in the transcript, and THREE answer options: "
-        "1 correct (grade=good), 1 partially correct (grade=mid), 1 incorrect (grade=bad). "
-        "Provide a short supporting quote/paraphrase from the transcript. Set slide to null if unknown. "
-        "\n[STRICT FORMAT]\n{\"roles\":[{\"actor\":str, \"question\":str, \"slide\": int|null, \"quote\": str, \"options\":[{\"text\":str, \"grade\":\"good|mid|bad\", \"explanation\":str}]}]}"
-    )
+    user = "[CONTEXT]\n" + _dumps(payload)
 
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        response_format={"type": "json_object"},
+    txt = _complete_json(
+        no_cache=no_cache,
+        on_partial=on_partial,
+        model=_model("objections"),
+        response_format=llm_schemas.OBJECTIONS,
+        max_tokens=_MAX_TOKENS["objections"],
         messages=[
-            {"role": "system", "content": system},
+            {"role": "system", "content": _OBJECTIONS_SYSTEM},
             {"role": "user", "content": user},
         ],
         temperature=0,
     )
-
-    txt = (resp.choices[0].message.content or "").strip()
     try:
-        parsed = json.loads(txt)
+        parsed = _loads(txt)
         roles = parsed.get("roles") or []
         out_roles: List[Dict[str, Any]] = []
         for r in roles:
@@ -478,16 +1089,27 @@ def generate_objections_with_answers(
                     options.append({"text": text, "grade": grade, "explanation": explanation})
             if actor and question and options:
                 out_roles.append({"actor": actor, "question": question, "slide": slide_num, "quote": quote, "options": options})
-        logging.getLogger(__name__).info("objections_generated", extra={"roles": len(out_roles)})
+        _log.info("objections_generated", extra={"roles": len(out_roles)})
         return {"roles": out_roles[:3]}
     except Exception:
         return {"roles": []}
 
 
+_DECK_REVIEW_SYSTEM = (
+    "Ты — строгий русскоязычный консультант по дизайну презентаций. "
+    "Кратко и по делу укажи, что улучшить: структура, визуал, плотность текста, читаемость, акценты. "
+    "Сформулируй 7–12 конкретных рекомендаций по улучшению слайдов (одно предложение на пункт). "
+    "Не повторяйся. Учитывай контекст и метрики (плотность/контраст/шрифты/стилистика). "
+    "Формат ответа: {\"recommendations\":[str]}. "
+    "Выдай строго валидный JSON."
+)
+
+
 def review_deck_with_llm(
     slides: List[Dict[str, Any]],
     deck_metrics: Dict[str, Any],
     meta: Optional[Dict[str, Any]] = None,
+    no_cache: bool = False,
 ) -> Dict[str, Any]:
     """Ask LLM to review slide deck quality and return concise recommendations.
 
@@ -506,11 +1128,6 @@ def review_deck_with_llm(
             "bullets": bullets_joined[:600],
         })
 
-    system = (
-        "Ты — строгий русскоязычный консультант по дизайну презентаций. "
-        "Кратко и по делу укажи, что улучшить: структура, визуал, плотность текста, читаемость, акценты. "
-        "Выдай строго валидный JSON."
-    )
     payload = {
         "meta": {
             "goal": meta.get("goal") or meta.get("goal_other") or None,
@@ -522,37 +1139,42 @@ def review_deck_with_llm(
         "metrics": deck_metrics,
         "slides": compact_slides,
     }
-    user = (
-        "[КОНТЕКСТ]\n" + json.dumps(payload, ensure_ascii=False) +
-        "\n[ЗАДАНИЕ]\nСформулируй 7–12 конкретных рекомендаций по улучшению слайдов (одно предложение на пункт).\n"
-        "Не повторяйся. Учитывай контекст и метрики (плотность/контраст/шрифты/стилистика).\n"
-        "[ФОРМАТ ОТВЕТА]\n{\"recommendations\":[str]}"
-    )
+    user = "[КОНТЕКСТ]\n" + _dumps(payload)
 
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        response_format={"type": "json_object"},
+    txt = _complete_json(
+        no_cache=no_cache,
+        model=_model("deck"),
+        response_format=llm_schemas.DECK_REVIEW,
+        max_tokens=_MAX_TOKENS["deck"],
         messages=[
-            {"role": "system", "content": system},
+            {"role": "system", "content": _DECK_REVIEW_SYSTEM},
             {"role": "user", "content": user},
         ],
         temperature=0,
     )
-    txt = (resp.choices[0].message.content or "").strip()
     try:
-        parsed = json.loads(txt)
+        parsed = _loads(txt)
         recs = [str(x) for x in (parsed.get("recommendations") or [])][:12]
     except Exception:
         recs = []
-    logging.getLogger(__name__).info("deck_review", extra={"recs": len(recs)})
+    _log.info("deck_review", extra={"recs": len(recs)})
     return {"recommendations": recs}
 
 
+_DECK_PER_SLIDE_SYSTEM = (
+    "Ты — строгий русскоязычный консультант по слайдам. Для КАЖДОГО слайда оцени необходимость улучшений и дай до 3–5 кратких рекомендаций (по визуалу/структуре/тексту/акцентам). "
+    "Если слайд уже хороший и улучшения не требуются — верни ПУСТОЙ список рекомендаций для этого слайда. Не дублируй одни и те же советы на соседних слайдах. "
+    "Затем добавь до 5 общих советов по всей колоде. "
+    "Формат: {\"per_slide\":[{\"index\":int, \"recommendations\":[str]}], \"general\":[str]}. Верни строго JSON."
+)
+
+
 def review_deck_per_slide(
     slides: List[Dict[str, Any]],
     deck_metrics: Dict[str, Any],
     meta: Optional[Dict[str, Any]] = None,
     max_slides: int = 30,
+    no_cache: bool = False,
 ) -> Dict[str, Any]:
     """LLM review per slide: returns recommendations per slide and general deck tips.
 
@@ -566,10 +1188,6 @@ def review_deck_per_slide(
         text_joined = " \n- ".join([str(b)[:300] for b in bullets][:4])
         compact.append({"index": s.get("index"), "title": title[:160], "content": text_joined[:800]})
 
-    system = (
-        "Ты — строгий русскоязычный консультант по слайдам. Для КАЖДОГО слайда оцени необходимость улучшений и дай до 3–5 кратких рекомендаций (по визуалу/структуре/тексту/акцентам). "
-        "Если слайд уже хороший и улучшения не требуются — верни ПУСТОЙ список рекомендаций для этого слайда. Не дублируй одни и те же советы на соседних слайдах. Верни строго JSON."
-    )
     payload = {
         "meta": {
             "goal": meta.get("goal") or meta.get("goal_other") or None,
@@ -581,23 +1199,20 @@ def review_deck_per_slide(
         "metrics": deck_metrics,
         "slides": compact,
     }
-    user = (
-        "[КОНТЕКСТ]\n" + json.dumps(payload, ensure_ascii=False) +
-        "\n[ЗАДАНИЕ]\nДля каждого слайда верни ДО 3–5 пунктов, но если улучшения не требуются — верни пустой список. Затем добавь до 5 общих советов по всей колоде.\n"
-        "[ФОРМАТ]\n{\"per_slide\":[{\"index\":int, \"recommendations\":[str]}], \"general\":[str]}"
-    )
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        response_format={"type": "json_object"},
+    user = "[КОНТЕКСТ]\n" + _dumps(payload)
+    txt = _complete_json(
+        no_cache=no_cache,
+        model=_model("deck"),
+        response_format=llm_schemas.DECK_REVIEW_PER_SLIDE,
+        max_tokens=_DECK_TOKENS_PER_SLIDE * len(compact) + 400,
         messages=[
-            {"role": "system", "content": system},
+            {"role": "system", "content": _DECK_PER_SLIDE_SYSTEM},
             {"role": "user", "content": user},
         ],
         temperature=0,
     )
-    txt = (resp.choices[0].message.content or "").strip()
     try:
-        parsed = json.loads(txt)
+        parsed = _loads(txt)
         per_slide = parsed.get("per_slide") or []
         general = parsed.get("general") or []
         # sanitize
@@ -613,5 +1228,5 @@ def review_deck_per_slide(
     except Exception:
         out = []
         general_s = []
-    logging.getLogger(__name__).info("deck_review_per_slide", extra={"slides": len(out), "general": len(general_s)})
+    _log.info("deck_review_per_slide", extra={"slides": len(out), "general": len(general_s)})
     return {"per_slide": out, "general": general_s}
\ No newline at end of file
@@ -0,0 +1,305 @@
+"""Exact-match response cache for deterministic (temperature=0) chat calls.
+
+complete()/acomplete() wrap client.chat.completions.create and return the
+stripped message content. Requests are keyed by sha256 over the canonical JSON
+of all request kwargs (model, messages, response_format, ...), so any change to
+the prompt is a miss. Only temperature=0 requests are cached; pass
+no_cache=True to force a fresh call.
+
+Two tiers: an in-process LRU in front of a SQLite file shared by all workers
+and surviving restarts (LLM_CACHE_PATH, default <repo>/.cache/llm.sqlite3;
+set to "off" to disable). Disk entries expire after 7 days and the file is
+trimmed to ~1 GB, least recently used first. Entries are plain strings; the
+disk tier is best-effort and any SQLite error is treated as a miss.
+
+With LLM_SEMANTIC_CACHE=1, exact misses also consult the semantic tier
+(semantic_cache) before calling the model.
+
+complete(..., validate=fn) only caches (and only serves cached) replies for
+which fn(reply) is true, so a malformed or truncated reply is never reused;
+store(kwargs, reply) caches a reply obtained some other way (e.g. a repair
+retry) under the original request.
+
+complete(..., on_partial=cb) streams the response instead and calls cb with
+the partially parsed JSON document (jiter partial mode) whenever a chunk
+closes an object or array, so callers can surface results early.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+import orjson
+
+from app.core.paths import ROOT
+
+from . import semantic_cache
+
+
+_MAX_ENTRIES = 4096
+
+_DISK_TTL_S = 7 * 24 * 3600
+_DISK_MAX_BYTES = 1 << 30
+_DISK_TRIM_EVERY = 256  # puts between size checks
+
+_store: "OrderedDict[str, str]" = OrderedDict()
+_lock = threading.Lock()
+_log = logging.getLogger(__name__)
+
+
+def _key(kwargs: Any) -> Optional[str]:
+    if kwargs.get("temperature") != 0 or kwargs.get("stream"):
+        return None
+    blob = orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return hashlib.sha256(blob).hexdigest()
+
+
+class _DiskCache:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_accessed ON llm(accessed)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute(
+                    "SELECT value FROM llm WHERE key = ? AND created > ?", (key, now - _DISK_TTL_S)
+                ).fetchone()
+                if row is not None:
+                    db.execute("UPDATE llm SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as exc:
+            _log.debug("llm disk cache read failed: %s", exc)
+            return None
+        return row[0] if row is not None else None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO llm (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value.encode("utf-8")), now, now),
+                )
+                self._puts += 1
+                if self._puts % _DISK_TRIM_EVERY == 1:
+                    self._trim(db, now)
+        except sqlite3.Error as exc:
+            _log.debug("llm disk cache write failed: %s", exc)
+
+    @staticmethod
+    def _trim(db: sqlite3.Connection, now: float) -> None:
+        db.execute("DELETE FROM llm WHERE created <= ?", (now - _DISK_TTL_S,))
+        (total,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM llm").fetchone()
+        if total <= _DISK_MAX_BYTES:
+            return
+        # Drop least recently used rows until ~90% of the cap
+        excess = total - int(_DISK_MAX_BYTES * 0.9)
+        db.execute(
+            "DELETE FROM llm WHERE key IN ("
+            " SELECT key FROM (SELECT key, size, SUM(size) OVER (ORDER BY accessed, key) AS run FROM llm)"
+            " WHERE run - size < ?)",
+            (excess,),
+        )
+
+
+def _disk_cache() -> Optional[_DiskCache]:
+    raw = os.getenv("LLM_CACHE_PATH", "")
+    if raw.lower() in {"off", "0", "false", "none"}:
+        return None
+    return _DiskCache(Path(raw) if raw else ROOT / ".cache" / "llm.sqlite3")
+
+
+_disk = _disk_cache()
+
+
+def get(key: str) -> Optional[str]:
+    with _lock:
+        hit = _store.get(key)
+        if hit is not None:
+            _store.move_to_end(key)
+            return hit
+    if _disk is None:
+        return None
+    hit = _disk.get(key)
+    if hit is not None:
+        _remember(key, hit)
+    return hit
+
+
+def _remember(key: str, value: str) -> None:
+    with _lock:
+        _store[key] = value
+        _store.move_to_end(key)
+        while len(_store) > _MAX_ENTRIES:
+            _store.popitem(last=False)
+
+
+def put(key: str, value: str) -> None:
+    _remember(key, value)
+    if _disk is not None:
+        _disk.put(key, value)
+
+
+def _content(resp: Any) -> str:
+    usage = getattr(resp, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    if usage is not None:
+        # cached_tokens > 0 means the provider reused the prompt prefix
+        _log.debug(
+            "llm_usage",
+            extra={
+                "model": getattr(resp, "model", None),
+                "prompt_tokens": getattr(usage, "prompt_tokens", None),
+                "cached_tokens": getattr(details, "cached_tokens", None),
+            },
+        )
+    return (resp.choices[0].message.content or "").strip()
+
+
+class _StreamAccumulator:
+    """Collects streamed deltas and reports partial JSON parses."""
+
+    def __init__(self, on_partial: Callable[[Any], None]) -> None:
+        from jiter import from_json
+
+        self._from_json = from_json
+        self._on_partial = on_partial
+        # Collect deltas in a list and join once; += on str is quadratic
+        self._chunks: List[str] = []
+
+    def feed(self, event: Any) -> None:
+        if not event.choices:
+            return
+        delta = event.choices[0].delta.content
+        if not delta:
+            return
+        self._chunks.append(delta)
+        # Only re-parse when a value may just have closed
+        if delta.rstrip()[-1:] in ("}", "]"):
+            try:
+                self._on_partial(self._from_json("".join(self._chunks).encode("utf-8"), partial_mode="trailing-strings"))
+            except ValueError:
+                pass
+
+    def text(self) -> str:
+        return "".join(self._chunks).strip()
+
+
+def _stream_content(stream: Any, on_partial: Callable[[Any], None]) -> str:
+    acc = _StreamAccumulator(on_partial)
+    for event in stream:
+        acc.feed(event)
+    return acc.text()
+
+
+async def _astream_content(stream: Any, on_partial: Callable[[Any], None]) -> str:
+    acc = _StreamAccumulator(on_partial)
+    async for event in stream:
+        acc.feed(event)
+    return acc.text()
+
+
+def _valid(txt: str, validate: Optional[Callable[[str], bool]]) -> bool:
+    return validate is None or validate(txt)
+
+
+def complete(
+    client: Any,
+    *,
+    no_cache: bool = False,
+    on_partial: Optional[Callable[[Any], None]] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+    **kwargs: Any,
+) -> str:
+    """client.chat.completions.create(**kwargs) content, served from cache when possible."""
+    key = None if no_cache else _key(kwargs)
+    probe = None
+    if key is not None:
+        hit = get(key)
+        if hit is not None and _valid(hit, validate):
+            return hit
+        probe = semantic_cache.prepare(kwargs)
+        hit = semantic_cache.lookup(probe) if probe is not None else None
+        if hit is not None and _valid(hit, validate):
+            put(key, hit)
+            return hit
+    if on_partial is not None:
+        txt = _stream_content(client.chat.completions.create(stream=True, **kwargs), on_partial)
+    else:
+        txt = _content(client.chat.completions.create(**kwargs))
+    if key is not None and txt and _valid(txt, validate):
+        _put_reply(key, probe, txt)
+    return txt
+
+
+async def acomplete(
+    aclient: Any,
+    *,
+    no_cache: bool = False,
+    on_partial: Optional[Callable[[Any], None]] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+    **kwargs: Any,
+) -> str:
+    """Async twin of complete() for AsyncOpenAI clients.
+
+    Cache reads and writes (SQLite, index search) run in worker threads so
+    they never block the event loop shared with other in-flight requests.
+    """
+    key = None if no_cache else _key(kwargs)
+    probe = None
+    if key is not None:
+        hit = await asyncio.to_thread(get, key)
+        if hit is not None and _valid(hit, validate):
+            return hit
+        probe = await asyncio.to_thread(semantic_cache.prepare, kwargs) if semantic_cache.ENABLED else None
+        hit = await asyncio.to_thread(semantic_cache.lookup, probe) if probe is not None else None
+        if hit is not None and _valid(hit, validate):
+            await asyncio.to_thread(put, key, hit)
+            return hit
+    if on_partial is not None:
+        txt = await _astream_content(await aclient.chat.completions.create(stream=True, **kwargs), on_partial)
+    else:
+        txt = _content(await aclient.chat.completions.create(**kwargs))
+    if key is not None and txt and _valid(txt, validate):
+        await asyncio.to_thread(_put_reply, key, probe, txt)
+    return txt
+
+
+def _put_reply(key: str, probe: Optional[semantic_cache.Probe], txt: str) -> None:
+    put(key, txt)
+    if probe is not None:
+        semantic_cache.add(probe, txt)
+
+
+def store(kwargs: Any, txt: str) -> None:
+    """Cache txt as the reply to the request kwargs (as passed to complete(), minus its own options)."""
+    key = _key(kwargs)
+    if key is not None and txt:
+        put(key, txt)
@@ -0,0 +1,114 @@
+"""JSON Schemas for structured (strict) LLM outputs used by judge.py.
+
+Each constant is a ready-to-use `response_format` value. Strict mode requires
+every property to be listed in `required` and `additionalProperties: false`
+on every object; optional values are expressed as a nullable type instead.
+"""
+
+from typing import Any, Dict
+
+
+def _str_list() -> Dict[str, Any]:
+    return {"type": "array", "items": {"type": "string"}}
+
+
+def _obj(**properties: Any) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def _response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+
+PER_SLIDE_JUDGE = _response_format(
+    "per_slide_judge",
+    _obj(
+        per_slide={
+            "type": "array",
+            "items": _obj(
+                index={"type": "integer"},
+                similarity_0_1={"type": "number"},
+                judgement={"type": "string"},
+                missing_points=_str_list(),
+                hallucinated_points=_str_list(),
+                evidence=_str_list(),
+            ),
+        }
+    ),
+)
+
+FEEDBACK = _response_format(
+    "feedback_and_questions",
+    _obj(
+        improvements=_str_list(),
+        questions=_obj(investor=_str_list(), tech=_str_list(), product=_str_list()),
+    ),
+)
+
+SCRIPT_VS_SPEECH = _response_format(
+    "script_vs_speech",
+    _obj(
+        similarity_0_1={"type": "number"},
+        notes={"type": "string"},
+        missing_points=_str_list(),
+        added_points=_str_list(),
+    ),
+)
+
+SCRIPT_QUALITY = _response_format(
+    "script_quality",
+    _obj(issues=_str_list(), suggestions=_str_list(), overall={"type": "string"}),
+)
+
+SCRIPT_META = _response_format(
+    "script_analysis",
+    _obj(
+        score_0_100={"type": "integer"},
+        recommendations={
+            "type": "array",
+            "items": _obj(text={"type": "string"}, important={"type": "integer", "enum": [0, 1]}),
+        },
+        thesis=_str_list(),
+    ),
+)
+
+OBJECTIONS = _response_format(
+    "objections",
+    _obj(
+        roles={
+            "type": "array",
+            "items": _obj(
+                actor={"type": "string"},
+                question={"type": "string"},
+                slide={"type": ["integer", "null"]},
+                quote={"type": "string"},
+                options={
+                    "type": "array",
+                    "items": _obj(
+                        text={"type": "string"},
+                        grade={"type": "string", "enum": ["good", "mid", "bad"]},
+                        explanation={"type": "string"},
+                    ),
+                },
+            ),
+        }
+    ),
+)
+
+DECK_REVIEW = _response_format("deck_review", _obj(recommendations=_str_list()))
+
+DECK_REVIEW_PER_SLIDE = _response_format(
+    "deck_review_per_slide",
+    _obj(
+        per_slide={
+            "type": "array",
+            "items": _obj(index={"type": "integer"}, recommendations=_str_list()),
+        },
+        general=_str_list(),
+    ),
+)
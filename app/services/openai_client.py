@@ -1,14 +1,74 @@
 """OpenAI-compatible clients.
 
-- chat_client: points to OpenRouter (uses OPENROUTER_API_KEY)
-- audio_client: points to OpenAI for Whisper (uses OPENAI_API_KEY)
+- get_chat_client(): points to OpenRouter (uses OPENROUTER_API_KEY)
+- get_chat_aclient(): async twin of the chat client, bound to a dedicated event loop
+- get_audio_client(): points to OpenAI for Whisper (uses OPENAI_API_KEY)
+- get_batch_client(): native OpenAI for the Batch API (OpenRouter has no batch endpoint)
+
+Clients are built on first use and then reused for the life of the process,
+so importing this module does not pull in the SDK or open connection pools.
+The old module attributes (client, chat_client, chat_aclient, audio_client,
+batch_client) still resolve to the same instances.
+
+The sync clients share one HTTP/2 connection pool (pools are per origin, so
+OpenRouter and OpenAI each keep their own warm connections); the async client
+has its own pool on its event loop.
+
+run_async(coro) runs a coroutine on the loop that owns the async client and
+blocks until it finishes, so sync code (pipeline threads) can fan out requests
+while the async client's connection pool is reused across calls.
 """
 
+import asyncio
 import os
-from openai import OpenAI
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, Optional, TypeVar
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+
+__all__ = [
+    "get_chat_client",
+    "get_chat_aclient",
+    "get_audio_client",
+    "get_batch_client",
+    "run_async",
+]
+
+T = TypeVar("T")
+
+
+def _http_options() -> Dict[str, Any]:
+    import httpx
+
+    return {
+        "http2": True,
+        "limits": httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        # Read timeout matches the SDK default (long Whisper uploads); fail fast on connect
+        "timeout": httpx.Timeout(600.0, connect=5.0),
+    }
+
+
+@lru_cache(maxsize=None)
+def _http() -> "httpx.Client":
+    from openai import DefaultHttpxClient
+
+    return DefaultHttpxClient(**_http_options())
+
+
+@lru_cache(maxsize=None)
+def _ahttp() -> "httpx.AsyncClient":
+    from openai import DefaultAsyncHttpxClient
+
+    return DefaultAsyncHttpxClient(**_http_options())
+
 
+def _chat_client_kwargs() -> Dict[str, Any]:
+    import httpx
 
-def _build_chat_client() -> OpenAI:
     api_key = os.getenv("OPENROUTER_API_KEY") or ""
     base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
     # Optional but recommended headers for OpenRouter analytics
@@ -19,26 +79,83 @@ def _build_chat_client() -> OpenAI:
     title = os.getenv("OPENROUTER_X_TITLE")
     if title:
         default_headers["X-Title"] = title
+    return {
+        "base_url": base_url,
+        "api_key": api_key,
+        "default_headers": default_headers or None,
+        # Chat replies are small; a stuck request should not hold a
+        # concurrency slot for the pool-wide 600s Whisper-sized read timeout
+        "timeout": httpx.Timeout(60.0, connect=5.0),
+        # The SDK retries connection errors, 408/409/429 and 5xx with jittered
+        # exponential backoff (honouring Retry-After); 2 retries = 3 attempts
+        "max_retries": int(os.getenv("LLM_MAX_RETRIES", "2")),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_chat_client() -> "OpenAI":
+    from openai import OpenAI
+
+    return OpenAI(http_client=_http(), **_chat_client_kwargs())
+
+
+@lru_cache(maxsize=None)
+def get_chat_aclient() -> "AsyncOpenAI":
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(http_client=_ahttp(), **_chat_client_kwargs())
+
+
+@lru_cache(maxsize=None)
+def get_audio_client() -> "OpenAI":
+    from openai import OpenAI
+
+    # Use native OpenAI for Whisper unless overridden; if OPENAI_BASE_URL is
+    # not set, SDK defaults to api.openai.com
     return OpenAI(
-        base_url=base_url,
-        api_key=api_key,
-        default_headers=default_headers or None,
+        api_key=os.getenv("OPENAI_API_KEY") or "",
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+        http_client=_http(),
     )
 
 
-def _build_audio_client() -> OpenAI:
-    # Use native OpenAI for Whisper unless overridden
-    api_key = os.getenv("OPENAI_API_KEY") or ""
-    # If not set, SDK defaults to api.openai.com
-    base_url = os.getenv("OPENAI_BASE_URL")
-    if base_url:
-        return OpenAI(base_url=base_url, api_key=api_key)
-    return OpenAI(api_key=api_key)
+def get_batch_client() -> "OpenAI":
+    return get_audio_client()
+
+
+# Backward compatibility: module attributes resolve lazily to the shared clients
+_LEGACY_ATTRS = {
+    "client": get_chat_client,
+    "chat_client": get_chat_client,
+    "chat_aclient": get_chat_aclient,
+    "audio_client": get_audio_client,
+    "batch_client": get_batch_client,
+}
+
+
+def __getattr__(name: str) -> Any:
+    factory = _LEGACY_ATTRS.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
+
+
+# Event loop that owns the async client. httpx connections are bound to the
+# loop they were opened on, so async calls must not go through per-call asyncio.run().
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
 
+def _client_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="openai-aio", daemon=True).start()
+            _loop = loop
+        return _loop
 
-# Public clients
-chat_client: OpenAI = _build_chat_client()
-audio_client: OpenAI = _build_audio_client()
 
-# Backward compatibility: many modules import `client` for chat
-client: OpenAI = chat_client
+def run_async(coro: Awaitable[T]) -> T:
+    """Run coro on the async client's loop and wait for its result (call from sync code)."""
+    return asyncio.run_coroutine_threadsafe(coro, _client_loop()).result()  # type: ignore[arg-type]
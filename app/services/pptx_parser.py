@@ -5,11 +5,36 @@ Exports parse_pptx_metrics() which returns:
 - deck_metrics: density, small fonts, contrast, style consistency, VBA flag
 """
 
-from typing import Any, Dict, List, Optional, Tuple
+import logging
+import posixpath
+import zipfile
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
 
-from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+_log = logging.getLogger(__name__)
+
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+_A_R, _A_RPR, _A_T = _A + "r", _A + "rPr", _A + "t"
+_A_P, _A_BR, _A_FLD = _A + "p", _A + "br", _A + "fld"
+_A_LATIN, _A_SOLID_FILL, _A_SRGB = _A + "latin", _A + "solidFill", _A + "srgbClr"
+_P_SP, _P_GRP_SP, _P_TX_BODY = _P + "sp", _P + "grpSp", _P + "txBody"
+_P_NV_PR, _P_PH = _P + "nvPr", _P + "ph"
+_P_SHAPE_TAGS = frozenset(_P + t for t in ("sp", "grpSp", "graphicFrame", "cxnSp", "pic", "contentPart"))
+_P_SP_TREE_PATH = f"{_P}cSld/{_P}spTree"
+_P_BG_PR_PATH = f"{_P}cSld/{_P}bg/{_P}bgPr"
+_P_SLD_SZ, _P_SLD_ID_LST = _P + "sldSz", _P + "sldIdLst"
+_SP_XFRM_EXT = f"{_P}spPr/{_A}xfrm/{_A}ext"
+_XFRM_EXT = {
+    _P + "graphicFrame": f"{_P}xfrm/{_A}ext",
+    _P_GRP_SP: f"{_P}grpSpPr/{_A}xfrm/{_A}ext",
+}
 
 
 def _srgb_channel_to_linear(channel: float) -> float:
@@ -18,13 +43,16 @@ def _srgb_channel_to_linear(channel: float) -> float:
     return ((channel + 0.055) / 1.055) ** 2.4
 
 
+# Channels are 0-255 integers: tabulate the sRGB transfer once instead of pow() per run
+_SRGB_LUT: Tuple[float, ...] = tuple(_srgb_channel_to_linear(i / 255.0) for i in range(256))
+
+
 def _relative_luminance(r: int, g: int, b: int) -> float:
-    rl = _srgb_channel_to_linear(r / 255.0)
-    gl = _srgb_channel_to_linear(g / 255.0)
-    bl = _srgb_channel_to_linear(b / 255.0)
-    return 0.2126 * rl + 0.7152 * gl + 0.0722 * bl
+    return 0.2126 * _SRGB_LUT[r] + 0.7152 * _SRGB_LUT[g] + 0.0722 * _SRGB_LUT[b]
 
 
+# Decks reuse a handful of font/background pairs
+@lru_cache(maxsize=4096)
 def _contrast_ratio(rgb1: Tuple[int, int, int], rgb2: Tuple[int, int, int]) -> float:
     l1 = _relative_luminance(*rgb1)
     l2 = _relative_luminance(*rgb2)
@@ -55,6 +83,326 @@ def _get_slide_background_rgb(slide) -> Optional[Tuple[int, int, int]]:
     return None
 
 
+def _iter_text_shapes(shapes, in_group: bool = False) -> Iterator[Tuple[Any, Any, bool]]:
+    """(shape, text_frame, in_group) for text shapes in a shape tree, descending into groups at any depth."""
+    from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+    for shape in shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            yield from _iter_text_shapes(shape.shapes, True)
+        elif hasattr(shape, "text_frame") and shape.text_frame:
+            yield shape, shape.text_frame, in_group
+
+
+# A deck uses a handful of colours across thousands of runs: parse each hex value once
+@lru_cache(maxsize=1024)
+def _hex_to_rgb(val: str) -> Optional[Tuple[int, int, int]]:
+    """(r, g, b) of an srgbClr val such as "1F497D", or None if it is not hex."""
+    try:
+        n = int(val, 16)
+    except ValueError:
+        return None
+    return (n >> 16 & 0xFF, n >> 8 & 0xFF, n & 0xFF)
+
+
+def _run_props(txBody) -> Iterator[Tuple[Optional[float], Optional[str], Optional[Tuple[int, int, int]]]]:
+    """(size_pt, typeface, srgb) of every run under a <p:txBody>, read straight from the XML.
+
+    Same values as run.font.size.pt / run.font.name / run.font.color.rgb
+    (direct formatting only; theme and scheme colours are None), without
+    building python-pptx Run/Font/ColorFormat wrappers per run.
+    """
+    for r in txBody.iter(_A_R):
+        rpr = r.find(_A_RPR)
+        if rpr is None:
+            yield None, None, None
+            continue
+        sz = rpr.get("sz")
+        latin = rpr.find(_A_LATIN)
+        rgb = None
+        fill = rpr.find(_A_SOLID_FILL)
+        if fill is not None:
+            clr = fill.find(_A_SRGB)
+            val = clr.get("val") if clr is not None else None
+            if val:
+                rgb = _hex_to_rgb(val)
+        name = latin.get("typeface") if latin is not None else None
+        # sz is in hundredths of a point
+        yield (int(sz) / 100.0 if sz else None), name or None, rgb
+
+
+# (text, area in EMU^2 or None, in_group, <p:txBody>) of a non-empty text shape
+_TextShape = Tuple[str, Optional[int], bool, Any]
+# (background rgb or None, title, notes, text shapes) of one slide
+_SlideData = Tuple[Optional[Tuple[int, int, int]], str, str, List[_TextShape]]
+
+
+def _read_slides_pptx(ppt_path: Path) -> Tuple[Tuple[int, int], List[_SlideData]]:
+    """Slide data through python-pptx (full package load)."""
+    # python-pptx pulls in lxml; import on first parse rather than at app startup
+    from pptx import Presentation
+
+    prs = Presentation(str(ppt_path))
+    slides: List[_SlideData] = []
+    for slide_index, slide in enumerate(list(prs.slides), start=1):
+        bg_rgb = _get_slide_background_rgb(slide)
+        shapes: List[_TextShape] = []
+        for shape, text_frame, in_group in _iter_text_shapes(slide.shapes):
+            t = text_frame.text or ""
+            if not t.strip():
+                continue
+            try:
+                area: Optional[int] = int(shape.width) * int(shape.height)
+            except Exception:
+                area = None
+            shapes.append((t, area, in_group, text_frame._txBody))
+
+        title = slide.shapes.title.text if slide.shapes.title else f"Slide {slide_index}"
+        notes = ""
+        if slide.has_notes_slide and slide.notes_slide and slide.notes_slide.notes_text_frame:
+            notes = (slide.notes_slide.notes_text_frame.text or "").strip()
+        slides.append((bg_rgb, title, notes, shapes))
+    return (prs.slide_width, prs.slide_height), slides
+
+
+class _Package:
+    """Just enough OPC to walk presentation -> slides -> layouts/masters/notes.
+
+    Parts are parsed on first use and kept for the rest of the parse, so a
+    layout or master shared by many slides is read once. Themes, media and
+    everything else in the package are never touched.
+    """
+
+    def __init__(self, zf: zipfile.ZipFile) -> None:
+        self._zf = zf
+        self._xml: Dict[str, Any] = {}
+        self._rels: Dict[str, Dict[str, Tuple[str, str]]] = {}
+
+    def xml(self, name: str) -> Any:
+        root = self._xml.get(name)
+        if root is None:
+            from lxml import etree
+
+            root = self._xml[name] = etree.fromstring(self._zf.read(name))
+        return root
+
+    def rels(self, name: str) -> Dict[str, Tuple[str, str]]:
+        """rId -> (relationship type, target part name) for internal relationships of part name."""
+        rels = self._rels.get(name)
+        if rels is not None:
+            return rels
+        rels = self._rels[name] = {}
+        base_dir, base = posixpath.split(name)
+        try:
+            root = self.xml(posixpath.join(base_dir, "_rels", base + ".rels"))
+        except KeyError:
+            return rels
+        for rel in root.iter(_REL):
+            if rel.get("TargetMode") == "External":
+                continue
+            target = rel.get("Target") or ""
+            part = target[1:] if target.startswith("/") else posixpath.normpath(posixpath.join(base_dir, target))
+            rels[rel.get("Id")] = (rel.get("Type") or "", part)
+        return rels
+
+    def related(self, name: str, rel_type: str) -> Optional[str]:
+        for typ, part in self.rels(name).values():
+            if typ.endswith(rel_type):
+                return part
+        return None
+
+
+# Layout placeholder type -> master placeholder it inherits from (python-pptx's table)
+_MASTER_PH_TYPE = {
+    "body": "body", "chart": "body", "clipArt": "body", "ctrTitle": "title", "dgm": "body",
+    "dt": "dt", "ftr": "ftr", "media": "body", "obj": "body", "pic": "body",
+    "sldNum": "sldNum", "subTitle": "body", "tbl": "body", "title": "title",
+}
+
+
+def _shape_elms(tree) -> Iterator[Any]:
+    for elm in tree:
+        if elm.tag in _P_SHAPE_TAGS:
+            yield elm
+
+
+def _group_sps(grp) -> Iterator[Any]:
+    """<p:sp> members of a group, descending into nested groups."""
+    for elm in grp:
+        if elm.tag == _P_SP:
+            yield elm
+        elif elm.tag == _P_GRP_SP:
+            yield from _group_sps(elm)
+
+
+def _ph(elm) -> Any:
+    """The <p:ph> of a shape element (./*[1]/p:nvPr/p:ph), or None."""
+    nv = elm[0] if len(elm) else None
+    nv_pr = nv.find(_P_NV_PR) if nv is not None else None
+    return nv_pr.find(_P_PH) if nv_pr is not None else None
+
+
+def _ph_idx(ph) -> int:
+    return int(ph.get("idx", "0"))
+
+
+def _ext(elm) -> Tuple[Optional[int], Optional[int]]:
+    """Directly applied (cx, cy) of a shape element."""
+    ext = elm.find(_XFRM_EXT.get(elm.tag, _SP_XFRM_EXT))
+    if ext is None:
+        return None, None
+    return int(ext.get("cx")), int(ext.get("cy"))
+
+
+def _tx_text(txBody) -> str:
+    """TextFrame.text: paragraphs joined by newlines, line breaks as vertical tabs."""
+    paragraphs = []
+    for p in txBody.iterchildren(_A_P):
+        parts = []
+        for child in p.iterchildren(_A_R, _A_BR, _A_FLD):
+            if child.tag == _A_BR:
+                parts.append("\v")
+            else:
+                t = child.find(_A_T)
+                parts.append((t.text or "") if t is not None else "")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _sp_text(elm) -> str:
+    """Shape.text of a <p:sp>; other shape kinds have no text frame in python-pptx."""
+    if elm.tag != _P_SP:
+        raise ValueError(f"placeholder {elm.tag} has no text frame")
+    txBody = elm.find(_P_TX_BODY)
+    return _tx_text(txBody) if txBody is not None else ""
+
+
+def _placeholder_area(pkg: _Package, slide_name: str, sp, ph) -> Optional[int]:
+    """int(width) * int(height) of a slide placeholder, inheriting missing dims like python-pptx."""
+    cx, cy = _ext(sp)
+    if cx is None or cy is None:
+        layout_name = pkg.related(slide_name, "/slideLayout")
+        base = None
+        if layout_name is not None:
+            idx = _ph_idx(ph)
+            base = next(
+                (e for e in _shape_elms(pkg.xml(layout_name).find(_P_SP_TREE_PATH))
+                 if (p := _ph(e)) is not None and _ph_idx(p) == idx),
+                None,
+            )
+        bx = by = None
+        if base is not None:
+            bx, by = _ext(base)
+            if base.tag == _P_SP and (bx is None or by is None):
+                master_type = _MASTER_PH_TYPE[_ph(base).get("type", "obj")]
+                master_name = pkg.related(layout_name, "/slideMaster")
+                master = None
+                if master_name is not None:
+                    for e in _shape_elms(pkg.xml(master_name).find(_P_SP_TREE_PATH)):
+                        p = _ph(e)
+                        if p is None:
+                            continue
+                        if e.tag != _P_SP:
+                            raise ValueError("non-shape master placeholder")
+                        if p.get("type", "obj") == master_type:
+                            master = e
+                            break
+                mx, my = _ext(master) if master is not None else (None, None)
+                bx = mx if bx is None else bx
+                by = my if by is None else by
+        cx = bx if cx is None else cx
+        cy = by if cy is None else cy
+    return cx * cy if cx is not None and cy is not None else None
+
+
+def _slide_bg_rgb(slide) -> Optional[Tuple[int, int, int]]:
+    """Direct solid sRGB background (p:bg/p:bgPr/a:solidFill), as _get_slide_background_rgb."""
+    bg_pr = slide.find(_P_BG_PR_PATH)
+    if bg_pr is None or not len(bg_pr) or bg_pr[0].tag != _A_SOLID_FILL:
+        return None
+    fill = bg_pr[0]
+    clr = fill[0] if len(fill) else None
+    if clr is None or clr.tag != _A_SRGB:
+        return None
+    val = clr.get("val")
+    return _hex_to_rgb(val) if val else None
+
+
+def _notes_text(pkg: _Package, slide_name: str) -> str:
+    notes_name = pkg.related(slide_name, "/notesSlide")
+    if notes_name is None:
+        return ""
+    for elm in _shape_elms(pkg.xml(notes_name).find(_P_SP_TREE_PATH)):
+        p = _ph(elm)
+        if p is not None and p.get("type") == "body":
+            return (_sp_text(elm) or "").strip()
+    return ""
+
+
+def _read_slides_xml(ppt_path: Path) -> Tuple[Tuple[int, int], List[_SlideData]]:
+    """Slide data straight from the package XML.
+
+    Metrics only need direct formatting, so instead of Presentation() (which
+    parses every part and builds wrapper objects for all of them) this opens
+    the zip and reads presentation.xml, the slides in deck order, and the
+    notes/layout/master parts they refer to. The result matches
+    _read_slides_pptx() field for field.
+    """
+    with zipfile.ZipFile(ppt_path) as zf:
+        pkg = _Package(zf)
+        pres_name = pkg.related("", "/officeDocument")
+        if pres_name is None:
+            raise ValueError("no presentation part")
+        pres = pkg.xml(pres_name)
+        sld_sz = pres.find(_P_SLD_SZ)
+        slide_size = (int(sld_sz.get("cx")), int(sld_sz.get("cy")))
+        pres_rels = pkg.rels(pres_name)
+
+        slides: List[_SlideData] = []
+        sld_ids = pres.find(_P_SLD_ID_LST)
+        for slide_index, sld_id in enumerate(sld_ids if sld_ids is not None else (), start=1):
+            slide_name = pres_rels[sld_id.get(_R_ID)][1]
+            slide = pkg.xml(slide_name)
+            tree = slide.find(_P_SP_TREE_PATH)
+
+            shapes: List[_TextShape] = []
+            title: Optional[str] = None
+            for elm in _shape_elms(tree):
+                ph = _ph(elm)
+                if title is None and ph is not None and _ph_idx(ph) == 0:
+                    title = _sp_text(elm)
+                if elm.tag == _P_GRP_SP:
+                    members = [(sub, True) for sub in _group_sps(elm)]
+                elif elm.tag == _P_SP:
+                    members = [(elm, False)]
+                else:
+                    continue
+                for sp, in_group in members:
+                    txBody = sp.find(_P_TX_BODY)
+                    if txBody is None:
+                        continue
+                    t = _tx_text(txBody)
+                    if not t.strip():
+                        continue
+                    try:
+                        if ph is not None and not in_group:
+                            area = _placeholder_area(pkg, slide_name, sp, ph)
+                        else:
+                            cx, cy = _ext(sp)
+                            area = cx * cy if cx is not None and cy is not None else None
+                    except Exception:
+                        area = None
+                    shapes.append((t, area, in_group, txBody))
+
+            slides.append((
+                _slide_bg_rgb(slide),
+                title if title is not None else f"Slide {slide_index}",
+                _notes_text(pkg, slide_name),
+                shapes,
+            ))
+    return slide_size, slides
+
+
 def parse_pptx_metrics(ppt_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """Extract slide texts and compute deck metrics from a PPTX/PPTM file.
 
@@ -62,82 +410,56 @@ def parse_pptx_metrics(ppt_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str,
     content_for_llm: list of {index, title, bullets[], notes}
     deck_metrics: density, small_fonts, contrast_issues, style_inconsistency, vba_summary
     """
-    prs = Presentation(str(ppt_path))
-    slide_size = (prs.slide_width, prs.slide_height)
+    try:
+        slide_size, slides = _read_slides_xml(ppt_path)
+    except Exception as exc:
+        # Anything the direct reader does not understand goes through python-pptx
+        _log.debug("direct pptx read failed, using python-pptx: %s", exc)
+        slide_size, slides = _read_slides_pptx(ppt_path)
 
     slides_summary: List[Dict[str, Any]] = []
-    deck_fonts: List[str] = []
-    deck_font_sizes: List[float] = []
+    # Deck-wide aggregates are kept as running totals rather than per-run lists
+    deck_fonts: Counter = Counter()
+    deck_font_size_sum = 0.0
+    deck_font_size_count = 0
 
-    for slide_index, slide in enumerate(prs.slides, start=1):
+    content_for_llm: List[Dict[str, Any]] = []
+    # One pass per slide builds both the metrics and the LLM content
+    for slide_index, (bg_rgb, title, notes, shapes) in enumerate(slides, start=1):
         slide_chars = 0
         text_shapes_area = 0
         min_font_pt_on_slide: Optional[float] = None
-        font_families_on_slide: List[str] = []
-        font_sizes_on_slide: List[float] = []
+        font_families_on_slide: Set[str] = set()
         contrast_issue = False
+        bullets: List[str] = []
 
-        bg_rgb = _get_slide_background_rgb(slide) or (255, 255, 255)
+        if bg_rgb is None:
+            bg_rgb = (255, 255, 255)
+
+        for t, area, in_group, txBody in shapes:
+            if not in_group:
+                bullets.append(t.strip())
+            slide_chars += len(t)
+            if area is not None:
+                text_shapes_area += area
+            for size, font_name, frgb in _run_props(txBody):
+                if size is not None:
+                    deck_font_size_sum += size
+                    deck_font_size_count += 1
+                    if min_font_pt_on_slide is None or size < min_font_pt_on_slide:
+                        min_font_pt_on_slide = size
+                if font_name:
+                    font_families_on_slide.add(font_name)
+                    deck_fonts[font_name] += 1
+                if frgb is not None and _contrast_ratio(frgb, bg_rgb) < 4.5:
+                    contrast_issue = True
 
-        for shape in slide.shapes:
-            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
-                for subshape in shape.shapes:
-                    if hasattr(subshape, "text_frame") and subshape.text_frame:
-                        t = subshape.text_frame.text or ""
-                        if not t.strip():
-                            continue
-                        slide_chars += len(t)
-                        try:
-                            text_shapes_area += int(subshape.width) * int(subshape.height)
-                        except Exception:
-                            pass
-                        for paragraph in subshape.text_frame.paragraphs:
-                            for run in paragraph.runs:
-                                size = run.font.size.pt if run.font.size is not None else None
-                                if size is not None:
-                                    font_sizes_on_slide.append(size)
-                                    deck_font_sizes.append(size)
-                                    if min_font_pt_on_slide is None or size < min_font_pt_on_slide:
-                                        min_font_pt_on_slide = size
-                                if run.font.name:
-                                    font_families_on_slide.append(run.font.name)
-                                    deck_fonts.append(run.font.name)
-                                try:
-                                    frgb = _pptx_color_to_rgb(run.font.color)
-                                    if frgb is not None:
-                                        ratio = _contrast_ratio(frgb, bg_rgb)
-                                        if ratio < 4.5:
-                                            contrast_issue = True
-                                except Exception:
-                                    pass
-            elif hasattr(shape, "text_frame") and shape.text_frame:
-                t = shape.text_frame.text or ""
-                if not t.strip():
-                    continue
-                slide_chars += len(t)
-                try:
-                    text_shapes_area += int(shape.width) * int(shape.height)
-                except Exception:
-                    pass
-                for paragraph in shape.text_frame.paragraphs:
-                    for run in paragraph.runs:
-                        size = run.font.size.pt if run.font.size is not None else None
-                        if size is not None:
-                            font_sizes_on_slide.append(size)
-                            deck_font_sizes.append(size)
-                            if min_font_pt_on_slide is None or size < min_font_pt_on_slide:
-                                min_font_pt_on_slide = size
-                        if run.font.name:
-                            font_families_on_slide.append(run.font.name)
-                            deck_fonts.append(run.font.name)
-                        try:
-                            frgb = _pptx_color_to_rgb(run.font.color)
-                            if frgb is not None:
-                                ratio = _contrast_ratio(frgb, bg_rgb)
-                                if ratio < 4.5:
-                                    contrast_issue = True
-                        except Exception:
-                            pass
+        content_for_llm.append({
+            "index": slide_index,
+            "title": title,
+            "bullets": bullets,
+            "notes": notes,
+        })
 
         slide_area = int(slide_size[0]) * int(slide_size[1]) or 1
         text_area_ratio = (text_shapes_area / slide_area) if slide_area else 0.0
@@ -151,7 +473,7 @@ def parse_pptx_metrics(ppt_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str,
             "text_area_ratio": round(text_area_ratio, 3),
             "density_score": density_score,
             "min_font_pt": min_font_pt_on_slide if min_font_pt_on_slide is not None else None,
-            "font_families": list(sorted(set(font_families_on_slide)))[:6],
+            "font_families": sorted(font_families_on_slide)[:6],
             "contrast_issue": contrast_issue,
         })
 
@@ -162,11 +484,10 @@ def parse_pptx_metrics(ppt_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str,
 
     majority_font = None
     if deck_fonts:
-        from collections import Counter
-        majority_font = Counter(deck_fonts).most_common(1)[0][0]
+        majority_font = deck_fonts.most_common(1)[0][0]
     avg_size = None
-    if deck_font_sizes:
-        avg_size = round(sum(deck_font_sizes) / len(deck_font_sizes), 1)
+    if deck_font_size_count:
+        avg_size = round(deck_font_size_sum / deck_font_size_count, 1)
 
     style_inconsistency_slides: List[int] = []
     if majority_font is not None and avg_size is not None:
@@ -184,25 +505,6 @@ def parse_pptx_metrics(ppt_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str,
         "vba_summary": vba_summary,
     }
 
-    content_for_llm: List[Dict[str, Any]] = []
-    for i, slide in enumerate(prs.slides, start=1):
-        title = slide.shapes.title.text if slide.shapes.title else f"Slide {i}"
-        bullets: List[str] = []
-        notes = ""
-        for shp in slide.shapes:
-            if hasattr(shp, "text_frame") and shp.text_frame:
-                tt = (shp.text_frame.text or "").strip()
-                if tt:
-                    bullets.append(tt)
-        if slide.has_notes_slide and slide.notes_slide and slide.notes_slide.notes_text_frame:
-            notes = (slide.notes_slide.notes_text_frame.text or "").strip()
-        content_for_llm.append({
-            "index": i,
-            "title": title,
-            "bullets": [b for b in bullets if b],
-            "notes": notes,
-        })
-
     return content_for_llm, deck_metrics
 
 
@@ -1,14 +1,42 @@
 """Render PPTX/PPTM to slide images.
 
-Uses LibreOffice for conversion (PDF/PNG) and pdf2image (poppler) for PDF→PNG.
+Uses LibreOffice for conversion (PDF/PNG) and poppler's pdftoppm for PDF→PNG
+(pdf2image if pdftoppm is not on PATH).
+
+Every soffice call runs with a persistent per-process user profile, so only the
+first conversion pays for creating one (a fresh profile per call costs
+seconds of LibreOffice start-up). A profile can be used by one instance at a
+time, so conversions within a process are serialized. The profile is removed
+at exit, and profiles of processes that died without cleaning up are swept
+on first use.
+
+Rendered slides are cached by deck content hash (and dpi) under
+.cache/renders/ and hard-linked into the session's output directory, so
+re-processing an unchanged deck skips LibreOffice entirely. The cache is
+trimmed to ~2 GB, least recently used deck first. Only complete (PDF path)
+renders are cached; the first-slide-only PNG fallback is retried each run.
 """
 
+import atexit
+import hashlib
+import os
+import shutil
 import subprocess
 import tempfile
+import threading
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 
-from pdf2image import convert_from_path
+from app.core.paths import ROOT
+
+
+_PROFILE_PREFIX = "libreoffice-"
+_PROFILE_DIR = ROOT / ".cache" / f"{_PROFILE_PREFIX}{os.getpid()}"
+_soffice_lock = threading.Lock()
+_profile_ready = False
+
+_RENDER_CACHE_DIR = ROOT / ".cache" / "renders"
+_RENDER_CACHE_MAX_BYTES = 2 << 30
 
 
 def render_pptx_to_images(ppt_path: Path, out_dir: Path, dpi: int = 150) -> List[Path]:
@@ -17,6 +45,73 @@ def render_pptx_to_images(ppt_path: Path, out_dir: Path, dpi: int = 150) -> List
     Returns list of image Paths in order. Raises if LibreOffice not found.
     """
     out_dir.mkdir(parents=True, exist_ok=True)
+    cached = _RENDER_CACHE_DIR / _render_key(ppt_path, dpi)
+    pngs = sorted(cached.glob("slide-*.png"))
+    if not pngs:
+        tmp = cached.with_name(f"{cached.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            pngs, complete = _render(ppt_path, tmp, dpi)
+            if not complete:
+                # The direct PNG export only writes the first slide: hand it out
+                # but don't cache it, so the next run tries the PDF path again
+                return [_link(src, out_dir / src.name) for src in pngs]
+            try:
+                os.replace(tmp, cached)
+            except OSError:
+                pass  # a concurrent render of the same deck got there first
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        pngs = sorted(cached.glob("slide-*.png"))
+        _trim_render_cache(keep=cached.name)
+    try:
+        os.utime(cached)  # mark as recently used for eviction
+        return [_link(src, out_dir / src.name) for src in pngs]
+    except FileNotFoundError:
+        # Another worker evicted the entry while we were linking from it
+        return _render(ppt_path, out_dir, dpi)[0]
+
+
+def _render_key(ppt_path: Path, dpi: int) -> str:
+    with open(ppt_path, "rb") as f:
+        digest = hashlib.file_digest(f, "blake2b").hexdigest()[:32]
+    return f"{digest}-{dpi}"
+
+
+def _link(src: Path, dst: Path) -> Path:
+    """Hard-link src to dst (copy across filesystems), replacing dst."""
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+    return dst
+
+
+def _trim_render_cache(keep: str) -> None:
+    """Evict least recently used decks down to the cap, never the entry named keep."""
+    try:
+        entries = []
+        for d in _RENDER_CACHE_DIR.iterdir():
+            if d.is_dir() and not d.name.endswith(".tmp") and d.name != keep:
+                entries.append((d.stat().st_mtime, sum(f.stat().st_size for f in d.iterdir()), d))
+    except OSError:
+        return
+    try:
+        keep_size = sum(f.stat().st_size for f in (_RENDER_CACHE_DIR / keep).iterdir())
+    except OSError:
+        keep_size = 0
+    total = keep_size + sum(size for _, size, _ in entries)
+    for _, size, d in sorted(entries, key=lambda e: e[0]):
+        if total <= _RENDER_CACHE_MAX_BYTES:
+            break
+        shutil.rmtree(d, ignore_errors=True)
+        total -= size
+
+
+def _render(ppt_path: Path, out_dir: Path, dpi: int) -> Tuple[List[Path], bool]:
+    """(slide PNGs in out_dir, complete). complete is False for the direct PNG
+    export fallback, which only produces the first slide."""
+    out_dir.mkdir(parents=True, exist_ok=True)
 
     # Convert PPTX using LibreOffice (soffice). Try PDF first, then PNG as fallback.
     soffice = _which_soffice()
@@ -31,14 +126,9 @@ def render_pptx_to_images(ppt_path: Path, out_dir: Path, dpi: int = 150) -> List
               _try_convert(soffice, ppt_path, tmp_dir, "pdf")
 
         if pdf and pdf.exists():
-            images = convert_from_path(str(pdf), dpi=dpi)
-            result_paths: List[Path] = []
-            for i, img in enumerate(images, start=1):
-                p = out_dir / f"slide-{i:03d}.png"
-                img.save(str(p), format="PNG")
-                result_paths.append(p)
+            result_paths = _pdf_to_pngs(pdf, tmp_dir, out_dir, dpi)
             if result_paths:
-                return result_paths
+                return result_paths, True
 
         # Fallback: try direct PNG export
         _ = _run_soffice(soffice, [
@@ -57,14 +147,48 @@ def render_pptx_to_images(ppt_path: Path, out_dir: Path, dpi: int = 150) -> List
                 dst = out_dir / f"slide-{i:03d}.png"
                 dst.write_bytes(src.read_bytes())
                 result_paths.append(dst)
-            return result_paths
+            return result_paths, False
 
         raise RuntimeError("LibreOffice conversion failed: no PDF or PNG produced. Ensure LibreOffice can open the file.")
 
 
-def _which_soffice() -> str | None:
-    import shutil
+def _pdf_to_pngs(pdf: Path, tmp_dir: Path, out_dir: Path, dpi: int) -> List[Path]:
+    """Rasterize pdf pages to out_dir/slide-NNN.png."""
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return _pdf_to_pngs_pil(pdf, out_dir, dpi)
+    # poppler writes the PNGs itself: no decode into PIL and re-encode per page
+    pages_dir = tmp_dir / "pages"
+    pages_dir.mkdir(exist_ok=True)
+    proc = subprocess.run(
+        [pdftoppm, "-png", "-r", str(dpi), str(pdf), str(pages_dir / "page")],
+        check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    # page-1.png / page-01.png ...: the padding depends on the page count
+    pages = sorted(pages_dir.glob("page-*.png"), key=lambda p: int(p.stem.rsplit("-", 1)[1]))
+    if proc.returncode != 0 or not pages:
+        return _pdf_to_pngs_pil(pdf, out_dir, dpi)
+    result_paths: List[Path] = []
+    for i, src in enumerate(pages, start=1):
+        dst = out_dir / f"slide-{i:03d}.png"
+        shutil.move(str(src), str(dst))
+        result_paths.append(dst)
+    return result_paths
+
+
+def _pdf_to_pngs_pil(pdf: Path, out_dir: Path, dpi: int) -> List[Path]:
+    from pdf2image import convert_from_path  # deferred: only needed without pdftoppm
+
+    images = convert_from_path(str(pdf), dpi=dpi)
+    result_paths: List[Path] = []
+    for i, img in enumerate(images, start=1):
+        p = out_dir / f"slide-{i:03d}.png"
+        img.save(str(p), format="PNG")
+        result_paths.append(p)
+    return result_paths
+
 
+def _which_soffice() -> str | None:
     for name in ["soffice", "libreoffice"]:
         p = shutil.which(name)
         if p:
@@ -83,7 +207,47 @@ def _try_convert(soffice: str, src: Path, outdir: Path, convert_to: str) -> Path
     return None
 
 
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by someone else
+    return True
+
+
+def _prepare_profile() -> None:
+    """Remove profiles left by dead processes and drop ours at exit (call under _soffice_lock).
+
+    Profiles are per pid, so every restart (--reload, worker recycling) would
+    otherwise leave one behind in .cache/.
+    """
+    global _profile_ready
+    if _profile_ready:
+        return
+    _profile_ready = True
+    atexit.register(shutil.rmtree, _PROFILE_DIR, ignore_errors=True)
+    try:
+        stale = [
+            d for d in _PROFILE_DIR.parent.glob(f"{_PROFILE_PREFIX}*")
+            if d != _PROFILE_DIR and d.name[len(_PROFILE_PREFIX):].isdigit()
+            and not _pid_alive(int(d.name[len(_PROFILE_PREFIX):]))
+        ]
+    except OSError:
+        return
+    for d in stale:
+        shutil.rmtree(d, ignore_errors=True)
+
+
 def _run_soffice(soffice: str, args: List[str]) -> subprocess.CompletedProcess:
-    return subprocess.run([soffice, *args], check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    profile = f"-env:UserInstallation={_PROFILE_DIR.as_uri()}"
+    # Callers look at the files written, never at soffice's output
+    with _soffice_lock:
+        _prepare_profile()
+        return subprocess.run(
+            [soffice, profile, "--nologo", "--nofirststartwizard", "--norestore", *args],
+            check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
 
 
@@ -0,0 +1,290 @@
+"""Opt-in semantic tier for llm_cache.
+
+When LLM_SEMANTIC_CACHE=1, a request that misses the exact cache is embedded
+and compared against earlier requests with the same model, system prompt and
+options (the "scope"); if the user content is near-identical (cosine >=
+LLM_SEMANTIC_THRESHOLD, default 0.97) the earlier reply is reused. This covers
+iterative edits where a script or meta changes by a few characters.
+
+Only text-only requests take part: an embedding of the text cannot tell two
+different slide images apart. Texts longer than the embedding model accepts
+skip the tier too; they are never truncated. Vectors live in memory per scope
+(bounded, FIFO eviction). Any embedding failure simply skips the tier.
+
+Concurrent lookups are embedded together: texts are queued and a background
+thread sends them in one embeddings request once 50 are pending or 50 ms have
+passed since the first, so a fan-out of N calls costs one round trip. Recent
+embeddings are also kept by text hash, so repeated content is not re-embedded.
+
+With LLM_EMBED_LOCAL=1 texts are embedded in-process with sentence-transformers
+(LLM_EMBED_LOCAL_MODEL, default a multilingual MiniLM) instead of the
+embeddings API, so a lookup costs no network round trip. If the package or
+model is unavailable the remote API is used instead.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import orjson
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+ENABLED = os.getenv("LLM_SEMANTIC_CACHE", "false").lower() in {"1", "true", "yes", "on"}
+THRESHOLD = float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.97"))
+EMBED_MODEL = os.getenv("LLM_EMBED_MODEL", "text-embedding-3-small")
+EMBED_LOCAL = os.getenv("LLM_EMBED_LOCAL", "false").lower() in {"1", "true", "yes", "on"}
+# Prompts are mostly Russian; the English-only all-MiniLM-L6-v2 matches them poorly
+EMBED_LOCAL_MODEL = os.getenv("LLM_EMBED_LOCAL_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+
+_MAX_PER_SCOPE = 1024
+_MAX_SCOPES = 64
+# text-embedding-3-* accept 8191 tokens. Longer texts skip the tier rather than
+# being cut: two prompts sharing a prefix would otherwise get the same vector
+_MAX_EMBED_TOKENS = 8000
+
+_BATCH_MAX = 50
+_BATCH_WAIT_S = 0.05
+_EMBED_TIMEOUT_S = 30.0
+_MAX_VECTORS = 2048
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class Probe:
+    scope: str
+    vector: "np.ndarray"
+
+
+class _ScopeIndex:
+    def __init__(self) -> None:
+        self.vectors: List["np.ndarray"] = []
+        self.values: List[str] = []
+        self._matrix: Optional["np.ndarray"] = None
+
+    def search(self, vec: "np.ndarray") -> Optional[str]:
+        import numpy as np
+
+        if not self.vectors:
+            return None
+        if self._matrix is None:
+            self._matrix = np.vstack(self.vectors)
+        sims = self._matrix @ vec
+        best = int(np.argmax(sims))
+        return self.values[best] if float(sims[best]) >= THRESHOLD else None
+
+    def add(self, vec: "np.ndarray", value: str) -> None:
+        self.vectors.append(vec)
+        self.values.append(value)
+        if len(self.vectors) > _MAX_PER_SCOPE:
+            del self.vectors[0], self.values[0]
+        self._matrix = None
+
+
+_scopes: "OrderedDict[str, _ScopeIndex]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _split(kwargs: Dict[str, Any]) -> Optional[tuple]:
+    """(scope hash, user text) for a text-only request, else None."""
+    messages = kwargs.get("messages") or []
+    user_parts: List[str] = []
+    fixed: List[Any] = []
+    for m in messages:
+        content = m.get("content")
+        if m.get("role") != "user":
+            fixed.append(m)
+            continue
+        if isinstance(content, str):
+            user_parts.append(content)
+            continue
+        for part in content or []:
+            if part.get("type") != "text":
+                return None
+            user_parts.append(part.get("text", ""))
+    text = "\n".join(user_parts)
+    if not text.strip():
+        return None
+    if not _fits(text):
+        return None
+    rest = {k: v for k, v in kwargs.items() if k != "messages"}
+    blob = orjson.dumps([rest, fixed], option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return hashlib.sha256(blob).hexdigest(), text
+
+
+@lru_cache(maxsize=1)
+def _local_model() -> Any:
+    """The sentence-transformers model if local embeddings are enabled and loadable, else None."""
+    if not EMBED_LOCAL:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(EMBED_LOCAL_MODEL)
+    except Exception as exc:
+        _log.warning("local embedding model unavailable, using %s: %s", EMBED_MODEL, exc)
+        return None
+
+
+@lru_cache(maxsize=1)
+def _api_encoding() -> Any:
+    """cl100k_base (the text-embedding-3 tokenizer), or None without tiktoken."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def _fits(text: str) -> bool:
+    """True if the embedding model sees all of text (neither rejected nor silently truncated)."""
+    model = _local_model()
+    if model is not None:
+        # sentence-transformers truncates at max_seq_length without telling
+        limit = getattr(model, "max_seq_length", None)
+        if not limit:
+            return True
+        return len(model.tokenizer(text, add_special_tokens=True)["input_ids"]) <= limit
+    enc = _api_encoding()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=())) <= _MAX_EMBED_TOKENS
+    # Without tiktoken: UTF-8 bytes / 3 overestimates tokens for Cyrillic and Latin text
+    return len(text.encode("utf-8")) // 3 <= _MAX_EMBED_TOKENS
+
+
+def embed(texts: List[str]) -> "np.ndarray":
+    """L2-normalized float32 embeddings, one row per text (single request)."""
+    import numpy as np
+
+    from .openai_client import get_audio_client
+
+    # The choice is fixed per process, so all vectors in an index share one model
+    model = _local_model()
+    if model is not None:
+        mat = model.encode(texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(mat, dtype=np.float32)
+
+    resp = get_audio_client().embeddings.create(model=EMBED_MODEL, input=texts)
+    mat = np.asarray([d.embedding for d in resp.data], dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat / np.maximum(norms, 1e-12)
+
+
+class _EmbedBatcher:
+    """Coalesces concurrent embed requests into batched embeddings calls."""
+
+    def __init__(self) -> None:
+        self._queue: "queue.SimpleQueue[Tuple[str, Future]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, text: str) -> "Future[np.ndarray]":
+        fut: "Future[np.ndarray]" = Future()
+        self._queue.put((text, fut))
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embed-batch", daemon=True)
+                    self._thread.start()
+        return fut
+
+    def _run(self) -> None:
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + _BATCH_WAIT_S
+            while len(pending) < _BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                mat = embed([text for text, _ in pending])
+            except Exception as exc:
+                if len(pending) == 1:
+                    pending[0][1].set_exception(exc)
+                    continue
+                # One bad input fails the whole request: retry each text on
+                # its own so the rest of the batch still gets vectors
+                for text, fut in pending:
+                    try:
+                        fut.set_result(embed([text])[0])
+                    except Exception as item_exc:
+                        fut.set_exception(item_exc)
+                continue
+            for i, (_, fut) in enumerate(pending):
+                if i < len(mat):
+                    fut.set_result(mat[i])
+                else:
+                    # Never leave a caller waiting out _EMBED_TIMEOUT_S
+                    fut.set_exception(RuntimeError(f"embeddings response has {len(mat)} rows for {len(pending)} inputs"))
+
+
+_batcher = _EmbedBatcher()
+_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_vectors_lock = threading.Lock()
+
+
+def _embed_one(text: str) -> "np.ndarray":
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _vectors_lock:
+        vec = _vectors.get(key)
+        if vec is not None:
+            _vectors.move_to_end(key)
+            return vec
+    vec = _batcher.submit(text).result(timeout=_EMBED_TIMEOUT_S)
+    with _vectors_lock:
+        _vectors[key] = vec
+        while len(_vectors) > _MAX_VECTORS:
+            _vectors.popitem(last=False)
+    return vec
+
+
+def prepare(kwargs: Dict[str, Any]) -> Optional[Probe]:
+    """Embed the request's user content; None if the tier does not apply."""
+    if not ENABLED:
+        return None
+    split = _split(kwargs)
+    if split is None:
+        return None
+    scope, text = split
+    try:
+        vec = _embed_one(text)
+    except Exception as exc:
+        _log.debug("semantic cache embed failed: %s", exc)
+        return None
+    return Probe(scope, vec)
+
+
+def lookup(probe: Probe) -> Optional[str]:
+    with _lock:
+        index = _scopes.get(probe.scope)
+        if index is None:
+            return None
+        _scopes.move_to_end(probe.scope)
+        return index.search(probe.vector)
+
+
+def add(probe: Probe, value: str) -> None:
+    with _lock:
+        index = _scopes.get(probe.scope)
+        if index is None:
+            index = _scopes[probe.scope] = _ScopeIndex()
+            while len(_scopes) > _MAX_SCOPES:
+                _scopes.popitem(last=False)
+        _scopes.move_to_end(probe.scope)
+        index.add(probe.vector, value)
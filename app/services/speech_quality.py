@@ -1,73 +1,202 @@
 """Speech quality metrics: speed, pauses, fillers, basic prosody.
 
-Relies on ffmpeg for webm/mp4→wav conversion and librosa for analysis.
+Relies on ffmpeg to decode webm/mp4 to PCM and librosa for analysis.
+librosa (numba, scipy, ...) is imported on first use, not at app startup.
+
+load_audio() and non_silent_intervals() are shared with transcription, which
+splits long recordings at pauses; the decoded clip is cached, so the audio
+is decoded once per run.
 """
 
+import os
 import re
 import subprocess
-import tempfile
 from dataclasses import dataclass, asdict
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-import librosa
 import numpy as np
 
 
 def _ffmpeg_available() -> bool:
     try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
         return True
     except Exception:
         return False
 
 
-def _to_wav(input_path: Path, target_sr: int = 16000) -> Path:
-    if input_path.suffix.lower() in {".wav"}:
-        return input_path
+def _decode_pcm(input_path: Path, target_sr: int = 16000) -> np.ndarray:
+    """Mono float32 samples decoded by ffmpeg straight into memory (s16le on stdout)."""
     if not _ffmpeg_available():
         raise RuntimeError("ffmpeg not found; install to enable speech quality metrics")
-    tmp = Path(tempfile.mkstemp(suffix=".wav")[1])
     cmd = [
-        "ffmpeg", "-y", "-i", str(input_path), "-ac", "1", "-ar", str(target_sr), str(tmp)
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-nostats",
+        "-i", str(input_path), "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", "1", "-ar", str(target_sr), "pipe:1",
     ]
-    subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-    return tmp
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+    # Same scaling librosa/soundfile apply when reading a 16-bit WAV
+    return np.frombuffer(proc.stdout, dtype="<i2").astype(np.float32) / 32768.0
+
+
+# Decoded clips are reused across calls (re-runs, report rebuilds); ~4 MB per
+# minute of 16 kHz float32 audio
+@lru_cache(maxsize=2)
+def _load_audio_cached(path_str: str, mtime_ns: int, size: int, sr: int) -> Tuple[np.ndarray, int]:
+    src = Path(path_str)
+    if src.suffix.lower() == ".wav":
+        import librosa
+
+        y, sr_out = librosa.load(path_str, sr=sr, mono=True)
+    else:
+        # No temporary WAV: ffmpeg resamples and hands over raw PCM
+        y, sr_out = _decode_pcm(src, target_sr=sr), sr
+    y.setflags(write=False)  # shared between callers
+    return y, sr_out
+
+
+def load_audio(audio_path: Path, sr: int = 16000) -> Tuple[np.ndarray, int]:
+    """Mono float32 samples of audio_path at sr, cached on the file's (mtime, size)."""
+    st = os.stat(audio_path)
+    return _load_audio_cached(str(audio_path), st.st_mtime_ns, st.st_size, sr)
+
+
+def _clip_intervals(intervals: np.ndarray, start: int, end: int) -> np.ndarray:
+    """(k, 2) intervals intersected with [start, end), relative to start."""
+    iv = intervals[(intervals[:, 1] > start) & (intervals[:, 0] < end)]
+    return np.clip(iv, start, end) - start
+
 
+def _pauses_ms(intervals: np.ndarray, n: int, sr: int) -> np.ndarray:
+    """Gaps (ms, truncated) before each interval and after the last one, within n samples."""
+    prev_ends = np.concatenate(([0], intervals[:-1, 1]))
+    gaps = intervals[:, 0] - prev_ends
+    gaps = gaps[gaps > 0]
+    tail = n - (int(intervals[-1, 1]) if len(intervals) else 0)
+    if tail > 0:
+        gaps = np.append(gaps, tail)
+    return (gaps / sr * 1000).astype(np.int64)
 
-def _non_silent_intervals(y: np.ndarray, sr: int) -> List[Tuple[int, int]]:
-    # Use librosa.effects.split to get non-silent (speech) intervals
-    intervals = librosa.effects.split(y, top_db=30)
-    return intervals.tolist() if hasattr(intervals, "tolist") else intervals
+
+def _pause_summary(pauses_ms: np.ndarray) -> Dict[str, int]:
+    if pauses_ms.size == 0:
+        return {"count": 0, "avg_ms": 0, "p90_ms": 0, "over_700ms": 0}
+    return {
+        "count": int(pauses_ms.size),
+        "avg_ms": int(np.mean(pauses_ms)),
+        "p90_ms": int(np.percentile(pauses_ms, 90)),
+        "over_700ms": int(np.count_nonzero(pauses_ms >= 700)),
+    }
+
+
+_SPLIT_TOP_DB = 30
+_SPLIT_FRAME = 2048
+_SPLIT_HOP = 512
+
+
+def non_silent_intervals(y: np.ndarray, sr: int) -> np.ndarray:
+    """Non-silent [start, end) sample intervals, (k, 2) int64, as librosa.effects.split(y, top_db=30).
+
+    Same framing (2048-sample centred frames, hop 512, zero padding) and
+    threshold (frame power within top_db of the loudest frame), but each frame's
+    energy is summed from four hop-sized block energies instead of framing the
+    signal with 4x overlap.
+    """
+    n = y.shape[0]
+    if n == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    # Energy per hop-sized block; frame i spans blocks i-2 .. i+1
+    n_blocks = -(-n // _SPLIT_HOP)
+    padded = np.zeros(n_blocks * _SPLIT_HOP, dtype=np.float32)
+    padded[:n] = y
+    blocks = padded.reshape(n_blocks, _SPLIT_HOP)
+    n_frames = 1 + n // _SPLIT_HOP
+    energy = np.zeros(n_frames + 3)
+    energy[2:2 + n_blocks] = np.einsum("ij,ij->i", blocks, blocks, dtype=np.float64)
+    mse = (energy[:-3] + energy[1:-2] + energy[2:-1] + energy[3:]) / _SPLIT_FRAME
+    amin = 1e-10
+    non_silent = np.maximum(mse, amin) > max(float(mse.max()), amin) * 10.0 ** (-_SPLIT_TOP_DB / 10.0)
+
+    edges = np.flatnonzero(np.diff(non_silent.astype(np.int8))) + 1
+    if non_silent[0]:
+        edges = np.concatenate(([0], edges))
+    if non_silent[-1]:
+        edges = np.concatenate((edges, [non_silent.size]))
+    edges = np.minimum(edges * _SPLIT_HOP, n)
+    return edges.astype(np.int64).reshape(-1, 2)
+
+
+_WORD_RE = re.compile(r"[\w\-']+", re.UNICODE)
+
+# Keys of the fillers dict in the report are these pattern strings
+_FILLERS = [
+    r"\bэ+\b", r"\bэм+\b", r"\bээ+\b", r"\bну\b", r"\bкак бы\b", r"\bтипа\b",
+    r"\bв общем\b", r"\bкороче\b", r"\bзначит\b", r"\bэто самое\b", r"\bскажем так\b",
+    r"\bum+\b", r"\buh+\b", r"\blike\b",
+]
+# One alternation, one scan; m.lastgroup names the pattern that matched
+_FILLER_RE = re.compile("|".join(f"(?P<g{i}>{p})" for i, p in enumerate(_FILLERS)), re.UNICODE)
+# The only overlapping pair: every "ээ+" match is also an "э+" match (same
+# span), which the alternation reports as "э+" alone
+_E, _EE = _FILLERS[0], _FILLERS[2]
 
 
 def _count_words(text: str) -> int:
-    return len(re.findall(r"[\w\-']+", text, flags=re.UNICODE))
+    return len(_WORD_RE.findall(text))
 
 
 def _filler_counts(text: str) -> Dict[str, int]:
-    t = text.lower()
-    fillers = [
-        r"\bэ+\b", r"\bэм+\b", r"\bээ+\b", r"\bну\b", r"\bкак бы\b", r"\bтипа\b",
-        r"\bв общем\b", r"\bкороче\b", r"\bзначит\b", r"\bэто самое\b", r"\bскажем так\b",
-        r"\bum+\b", r"\buh+\b", r"\blike\b",
-    ]
-    counts: Dict[str, int] = {}
-    for pattern in fillers:
-        counts[pattern] = len(re.findall(pattern, t, flags=re.UNICODE))
+    counts: Dict[str, int] = dict.fromkeys(_FILLERS, 0)
+    for m in _FILLER_RE.finditer(text.lower()):
+        pattern = _FILLERS[int(m.lastgroup[1:])]
+        counts[pattern] += 1
+        if pattern == _E and m.end() - m.start() > 1:
+            counts[_EE] += 1
     return counts
 
 
-def _pitch_stats(y: np.ndarray, sr: int) -> Tuple[Optional[float], Optional[float]]:
+_F0_MIN_HZ = 65.41    # C2
+_F0_MAX_HZ = 2093.0   # C7
+_WORLD_FRAME_MS = 5.0
+
+
+def _pitch_track(y: np.ndarray, sr: int) -> Tuple[Optional[np.ndarray], int]:
+    """(f0 per frame with NaN where unvoiced, hop in samples) for the whole clip.
+
+    Uses pyworld (DIO + StoneMask, C) when installed; librosa.pyin otherwise.
+    Computed once per clip; per-slide stats slice the track by frame.
+    """
+    try:
+        import pyworld
+
+        x = y.astype(np.float64)
+        f0, t = pyworld.dio(x, sr, f0_floor=_F0_MIN_HZ, f0_ceil=_F0_MAX_HZ, frame_period=_WORLD_FRAME_MS)
+        f0 = pyworld.stonemask(x, f0, t, sr)
+        f0[f0 <= 0] = np.nan
+        return f0, int(sr * _WORLD_FRAME_MS / 1000)
+    except ImportError:
+        pass
+    except Exception:
+        return None, 1
     try:
-        f0, voiced_flag, voiced_probs = librosa.pyin(y, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'))
-        f0 = np.array(f0)
-        valid = f0[~np.isnan(f0)]
-        if valid.size == 0:
-            return None, None
-        return float(np.nanmean(valid)), float(np.nanstd(valid))
+        import librosa
+
+        hop = 512
+        f0, _, _ = librosa.pyin(y, fmin=_F0_MIN_HZ, fmax=_F0_MAX_HZ, sr=sr, hop_length=hop)
+        return np.asarray(f0, dtype=np.float64), hop
     except Exception:
+        return None, 1
+
+
+def _pitch_stats(f0: Optional[np.ndarray]) -> Tuple[Optional[float], Optional[float]]:
+    if f0 is None:
+        return None, None
+    valid = f0[~np.isnan(f0)]
+    if valid.size == 0:
         return None, None
+    return float(np.mean(valid)), float(np.std(valid))
 
 
 def compute_speech_quality(
@@ -83,26 +212,16 @@ def compute_speech_quality(
     and words/fillers taken from per_slide_text[idx] if provided.
     """
     try:
-        wav_path = _to_wav(audio_path)
+        y, sr = load_audio(audio_path)
     except Exception as e:
         return {"available": False, "note": str(e)}
 
-    y, sr = librosa.load(str(wav_path), sr=16000, mono=True)
     total_duration_s = y.shape[0] / sr if sr else 0.0
-    intervals = _non_silent_intervals(y, sr)
-    speech_durations = [int((end - start) / sr * 1000) for start, end in intervals]
-    speaking_time_ms = int(sum(speech_durations))
-
-    # Pause stats: gaps between intervals
-    pauses_ms: List[int] = []
-    last_end = 0
-    for start, end in intervals:
-        if start > last_end:
-            pauses_ms.append(int((start - last_end) / sr * 1000))
-        last_end = end
-    # tail pause
-    if last_end < len(y):
-        pauses_ms.append(int((len(y) - last_end) / sr * 1000))
+    intervals = non_silent_intervals(y, sr)
+    # Per-interval durations are truncated to ms before summing
+    speaking_time_ms = int(((intervals[:, 1] - intervals[:, 0]) / sr * 1000).astype(np.int64).sum())
+    # Pause stats: gaps between intervals, plus the tail
+    pauses_ms = _pauses_ms(intervals, len(y), sr)
 
     words = _count_words(transcript_text)
     speaking_minutes = max(1e-9, speaking_time_ms / 60000.0)
@@ -112,7 +231,8 @@ def compute_speech_quality(
     filler = _filler_counts(transcript_text)
 
     # Pitch
-    pitch_mean_hz, pitch_std_hz = _pitch_stats(y, sr)
+    f0, f0_hop = _pitch_track(y, sr)
+    pitch_mean_hz, pitch_std_hz = _pitch_stats(f0)
 
     # Per-slide detailed stats if timing provided
     per_slide_stats: List[Dict[str, Any]] = []
@@ -131,36 +251,27 @@ def compute_speech_quality(
                 seg = y[start_samp:end_samp]
                 if seg.size == 0:
                     continue
-                seg_intervals = _non_silent_intervals(seg, sr)
-                seg_speaking_ms = int(sum((e - s) / sr * 1000 for s, e in seg_intervals))
+                # Speech intervals of the whole clip, clipped to this slide
+                seg_intervals = _clip_intervals(intervals, start_samp, end_samp)
+                # Integer ms from the total sample count (no float round-off at whole ms)
+                seg_speaking_ms = int(np.sum(seg_intervals[:, 1] - seg_intervals[:, 0])) * 1000 // sr
                 # pauses inside segment
-                seg_pauses_ms: List[int] = []
-                last_end = 0
-                for s_i, e_i in seg_intervals:
-                    if s_i > last_end:
-                        seg_pauses_ms.append(int((s_i - last_end) / sr * 1000))
-                    last_end = e_i
-                if last_end < len(seg):
-                    seg_pauses_ms.append(int((len(seg) - last_end) / sr * 1000))
+                seg_pauses_ms = _pauses_ms(seg_intervals, len(seg), sr)
 
                 slide_text = (per_slide_text or {}).get(idx, "")
                 slide_words = _count_words(slide_text)
                 seg_minutes = max(1e-9, seg_speaking_ms / 60000.0)
                 slide_wpm = slide_words / seg_minutes
                 slide_fillers = _filler_counts(slide_text)
-                seg_pitch_mean, seg_pitch_std = _pitch_stats(seg, sr)
+                seg_f0 = f0[start_samp // f0_hop:end_samp // f0_hop] if f0 is not None else None
+                seg_pitch_mean, seg_pitch_std = _pitch_stats(seg_f0)
 
                 per_slide_stats.append({
                     "index": idx,
                     "duration_ms": end_ms - start_ms,
                     "speaking_time_ms": seg_speaking_ms,
                     "wpm": round(slide_wpm, 2),
-                    "pauses": {
-                        "count": len(seg_pauses_ms),
-                        "avg_ms": int(np.mean(seg_pauses_ms)) if seg_pauses_ms else 0,
-                        "p90_ms": int(np.percentile(seg_pauses_ms, 90)) if seg_pauses_ms else 0,
-                        "over_700ms": int(sum(1 for p in seg_pauses_ms if p >= 700)),
-                    },
+                    "pauses": _pause_summary(seg_pauses_ms),
                     "fillers": slide_fillers,
                     "pitch_mean_hz": seg_pitch_mean,
                     "pitch_std_hz": seg_pitch_std,
@@ -173,12 +284,7 @@ def compute_speech_quality(
         "total_duration_ms": int(total_duration_s * 1000),
         "speaking_time_ms": speaking_time_ms,
         "wpm": round(wpm, 2),
-        "pauses": {
-            "count": len(pauses_ms),
-            "avg_ms": int(np.mean(pauses_ms)) if pauses_ms else 0,
-            "p90_ms": int(np.percentile(pauses_ms, 90)) if pauses_ms else 0,
-            "over_700ms": int(sum(1 for p in pauses_ms if p >= 700)),
-        },
+        "pauses": _pause_summary(pauses_ms),
         "fillers": filler,
         "pitch_mean_hz": pitch_mean_hz,
         "pitch_std_hz": pitch_std_hz,
@@ -1,10 +1,12 @@
-import json
+import os
 import threading
 import uuid
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+import orjson
 
 from app.core.paths import ARTIFACTS_DIR, UPLOADS_DIR
 import logging
@@ -16,13 +18,14 @@ from app.services.judge import (
     generate_feedback_and_questions,
     judge_script_vs_speech,
     review_script_quality,
+    model_for,
 )
 from app.services.pptx_render import render_pptx_to_images
 from app.services.doc_parser import parse_word_script
 from app.services.speech_quality import compute_speech_quality
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskInfo:
     """In-memory progress/state for a background processing task."""
     state: str = "PENDING"  # PENDING | RUNNING | FAILED | DONE
@@ -35,22 +38,31 @@ class TaskInfo:
 
 _tasks_lock = threading.Lock()
 _tasks: Dict[str, TaskInfo] = {}
+# Pipeline drivers. Their stages run on _stage_executor, so a driver waiting on
+# its stages never holds a slot its own stages need.
 _executor = ThreadPoolExecutor(max_workers=2)
+# Parse (CPU), render (LibreOffice subprocess) and ASR (network) of a run
+# have no data dependency and overlap here
+_stage_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stage")
+# Independent LLM calls of a pipeline run overlap here (I/O bound; the SDK
+# releases the GIL while waiting on the network)
+_llm_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm")
 
 
 def _set(task_id: str, **kwargs: Any) -> None:
-    with _tasks_lock:
-        info = _tasks.get(task_id)
-        if info is None:
-            info = TaskInfo()
-        for k, v in kwargs.items():
-            setattr(info, k, v)
-        _tasks[task_id] = info
+    # Each task is updated only by its own pipeline thread, so fields are set
+    # in place; the lock only guards creating the entry
+    info = _tasks.get(task_id)
+    if info is None:
+        with _tasks_lock:
+            info = _tasks.setdefault(task_id, TaskInfo())
+    for k, v in kwargs.items():
+        setattr(info, k, v)
 
 
 def get_task(task_id: str) -> Optional[TaskInfo]:
-    with _tasks_lock:
-        return _tasks.get(task_id)
+    # dict.get is atomic; readers never wait on a running pipeline
+    return _tasks.get(task_id)
 
 
 def _find_presentation(folder: Path) -> Optional[Path]:
@@ -70,26 +82,63 @@ def _find_audio(folder: Path) -> Optional[Path]:
 
 
 def _load_json(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    return orjson.loads(path.read_bytes()) if path.exists() else {}
+
+
+def _write_json(path: Path, obj: Any, *, indent: bool = True) -> None:
+    # Speech metrics may still carry numpy scalars; orjson writes them natively
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    path.write_bytes(orjson.dumps(obj, option=option))
+
 
+# Last snapshot written to status.json per task, to skip no-op rewrites
+_status_written: Dict[str, Dict[str, Any]] = {}
 
-def _write_json(path: Path, obj: Any) -> None:
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def _write_status(out_dir: Path, task_id: str) -> None:
+    """Mirror the task's in-memory state to status.json (machine-read, so compact).
+
+    Unchanged states are not rewritten. The file is replaced atomically so a
+    reader never sees a half-written document.
+    """
+    snapshot = asdict(_tasks.get(task_id) or TaskInfo())
+    if _status_written.get(task_id) == snapshot:
+        return
+    path = out_dir / "status.json"
+    tmp = path.with_suffix(".tmp")
+    try:
+        _write_json(tmp, snapshot, indent=False)
+        os.replace(tmp, path)
+    except Exception:
+        return
+    if snapshot["state"] in ("DONE", "FAILED"):
+        _status_written.pop(task_id, None)
+    else:
+        _status_written[task_id] = snapshot
+
+
+def _render_images(ppt_path: Path, images_dir: Path) -> List[Path]:
+    """Slide PNGs for multimodal judging; [] if rendering is unavailable."""
+    try:
+        return render_pptx_to_images(ppt_path, images_dir)
+    except Exception:
+        return []
 
 
 def _pipeline(session_id: str, task_id: str) -> None:
     """Run end-to-end pipeline for a session: parse, asr, judge, assemble."""
     lg = logging.getLogger(__name__)
+    # Stage futures of this run; whatever is still queued when it ends is cancelled
+    started: List[Future] = []
     try:
         lg.info("pipeline_start", extra={"session_id": session_id, "task_id": task_id})
         _set(task_id, state="RUNNING", stage="parse", progress_pct=5, session_id=session_id)
         folder = UPLOADS_DIR / session_id
         out_dir = ARTIFACTS_DIR / session_id
         out_dir.mkdir(parents=True, exist_ok=True)
-        try:
-            _write_json(out_dir / "status.json", asdict(_tasks.get(task_id) or TaskInfo()))
-        except Exception:
-            pass
+        _write_status(out_dir, task_id)
 
         data = _load_json(folder / "data.json")
         meta = _load_json(folder / "meta.json")
@@ -97,38 +146,49 @@ def _pipeline(session_id: str, task_id: str) -> None:
         ppt_path = _find_presentation(folder)
         if ppt_path is None:
             raise FileNotFoundError("Presentation not found")
+        audio_path = _find_audio(folder)
+        if audio_path is None:
+            raise FileNotFoundError("Audio/Video not found")
+
+        # Parse, render and ASR are independent until judging: run them together
+        images_dir = out_dir / "slides"
+        parse_f = _stage_executor.submit(parse_pptx_metrics, ppt_path)
+        render_f = _stage_executor.submit(_render_images, ppt_path, images_dir)
+        asr_f = _stage_executor.submit(transcribe_audio, audio_path, lang_hint=data.get("lang_hint"))
+        started += [parse_f, render_f, asr_f]
 
-        slides_content, deck_metrics = parse_pptx_metrics(ppt_path)
+        slides_content, deck_metrics = parse_f.result()
         _write_json(out_dir / "slides.json", {"slides": slides_content, "metrics": deck_metrics})
         lg.info("pptx_parsed", extra={"slides": len(slides_content)})
 
-        # Render slide images for multimodal judging
-        images_dir = out_dir / "slides"
-        image_paths = []
-        try:
-            image_paths = render_pptx_to_images(ppt_path, images_dir)
-        except Exception:
-            image_paths = []
+        image_paths = render_f.result()
         lg.info("pptx_render", extra={"images": len(image_paths)})
 
         _set(task_id, stage="asr", progress_pct=30)
-        try:
-            _write_json(out_dir / "status.json", asdict(_tasks.get(task_id) or TaskInfo()))
-        except Exception:
-            pass
-        audio_path = _find_audio(folder)
-        if audio_path is None:
-            raise FileNotFoundError("Audio/Video not found")
-        transcript = transcribe_audio(audio_path, lang_hint=data.get("lang_hint"))
+        _write_status(out_dir, task_id)
+        transcript = asr_f.result()
         (out_dir / "transcript.txt").write_text(transcript, encoding="utf-8")
         lg.info("asr_done", extra={"chars": len(transcript)})
 
         _set(task_id, stage="judge", progress_pct=60)
-        try:
-            _write_json(out_dir / "status.json", asdict(_tasks.get(task_id) or TaskInfo()))
-        except Exception:
-            pass
+        _write_status(out_dir, task_id)
+        # The script checks only need the transcript: start them now so they
+        # overlap slide judging and feedback generation
+        script_candidates = [folder / "word.docx", folder / "word.docm", folder / "script.docx", folder / "script.docm", folder / "word.doc"]
+        script_path = next((p for p in script_candidates if p.exists()), None)
+        script_eval_f = script_quality_f = None
+        if script_path is not None:
+            parsed = parse_word_script(script_path)
+            script_text = parsed.get("text", "")
+            if script_text:
+                script_eval_f = _llm_executor.submit(judge_script_vs_speech, script_text, transcript)
+                script_quality_f = _llm_executor.submit(review_script_quality, script_text)
+                started += [script_eval_f, script_quality_f]
+
         per_slide_text = slice_transcript_by_datajson(transcript, data)
+        # Speech quality is local DSP on the audio: run it while judging waits on the LLM
+        speech_quality_f = _stage_executor.submit(compute_speech_quality, audio_path, transcript, data, per_slide_text)
+        started.append(speech_quality_f)
         # Compute durations per slide from data.json if provided
         durations_ms_by_index: Dict[int, int] = {}
         for sl in data.get("slides", []) or []:
@@ -141,7 +201,7 @@ def _pipeline(session_id: str, task_id: str) -> None:
             except Exception:
                 continue
         image_map = {i + 1: p for i, p in enumerate(image_paths)} if image_paths else None
-        per_slide_results = judge_slides_batched(slides_content, per_slide_text, batch_size=3, image_path_by_index=image_map)
+        per_slide_results = judge_slides_batched(slides_content, per_slide_text, image_path_by_index=image_map)
         # Attach ASR transcript slice per slide to results
         for r in per_slide_results:
             try:
@@ -170,32 +230,27 @@ def _pipeline(session_id: str, task_id: str) -> None:
         lg.info("judge_done", extra={"similarity_avg": similarity_avg, "weak_slides": weak_slides})
 
         # Optional: compare uploaded script (Word) to transcript and review script quality
-        script_candidates = [folder / "word.docx", folder / "word.docm", folder / "script.docx", folder / "script.docm", folder / "word.doc"]
-        script_path = next((p for p in script_candidates if p.exists()), None)
-        script_eval = None
-        script_quality = None
-        if script_path is not None:
-            parsed = parse_word_script(script_path)
-            script_text = parsed.get("text", "")
-            if script_text:
-                script_eval = judge_script_vs_speech(script_text, transcript)
-                script_quality = review_script_quality(script_text)
+        script_eval = script_eval_f.result() if script_eval_f is not None else None
+        script_quality = script_quality_f.result() if script_quality_f is not None else None
         lg.info("script_eval", extra={"present": script_path is not None})
         overall_score = round(similarity_avg * 100.0, 1)
 
         # Speech quality metrics
         _set(task_id, stage="speech_quality", progress_pct=92)
-        try:
-            _write_json(out_dir / "status.json", asdict(_tasks.get(task_id) or TaskInfo()))
-        except Exception:
-            pass
-        speech_quality = compute_speech_quality(audio_path, transcript, data, per_slide_text)
+        _write_status(out_dir, task_id)
+        speech_quality = speech_quality_f.result()
         lg.info("speech_quality", extra={"available": bool(speech_quality.get("available"))})
 
         _set(task_id, stage="assemble", progress_pct=95)
         report: Dict[str, Any] = {
             "uuid": session_id,
-            "models": {"stt": "whisper-1", "judge": "gpt-4o-mini"},
+            # Effective models (PP_MODEL_* overrides included), so A/B runs can be attributed
+            "models": {
+                "stt": "whisper-1",
+                "judge": model_for("judge"),
+                "coach": model_for("coach"),
+                "reformat": model_for("reformat"),
+            },
             "overall_score": overall_score,
             "delivery": {"slide_speech_similarity_avg": similarity_avg},
             "slides": {"per_slide": per_slide_results},
@@ -208,19 +263,24 @@ def _pipeline(session_id: str, task_id: str) -> None:
             },
             "speech_quality": speech_quality,
         }
-        (out_dir / "report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        _write_json(out_dir / "report.json", report)
         (out_dir / "feedback.md").write_text("\n".join(f"- {imp}" for imp in improvements), encoding="utf-8")
-        (out_dir / "questions.json").write_text(json.dumps(questions, ensure_ascii=False, indent=2), encoding="utf-8")
+        _write_json(out_dir / "questions.json", questions)
 
         _set(task_id, state="DONE", stage="assemble", progress_pct=100)
-        try:
-            _write_json(out_dir / "status.json", asdict(_tasks.get(task_id) or TaskInfo()))
-        except Exception:
-            pass
+        _write_status(out_dir, task_id)
         lg.info("pipeline_done", extra={"task_id": task_id})
     except Exception as e:
         _set(task_id, state="FAILED", error_code="PIPELINE_ERROR", error_message=str(e))
+        _status_written.pop(task_id, None)
         lg.exception("pipeline_failed", extra={"task_id": task_id})
+    finally:
+        # After a failure the rest of the run is moot: drop stages that have not
+        # started yet (a paid Whisper call, LLM script checks). Running ones finish
+        # on their own; nothing waits for them.
+        abandoned = sum(1 for f in started if f.cancel())
+        if abandoned:
+            lg.info("pipeline_stages_cancelled", extra={"task_id": task_id, "count": abandoned})
 
 
 def start_process(session_id: str) -> str:
@@ -2,15 +2,136 @@
 
 transcribe_audio() returns plain text using whisper-1 with
 response_format="text".
+
+Recordings longer than a minute are decoded once (shared with
+speech_quality), cut into ~60 s chunks at pauses, and the chunks are
+transcribed concurrently in the language of the first one; the texts are
+joined in order. If the audio cannot be decoded locally the file is sent
+as is.
 """
 
+import io
+import wave
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
 
-from .openai_client import audio_client
+from .openai_client import get_audio_client
+from .speech_quality import load_audio, non_silent_intervals
 import logging
 
 
+_log = logging.getLogger(__name__)
+
+_CHUNK_S = 60
+_CHUNK_SR = 16000
+# Chunks of all running pipelines share these upload slots
+_chunk_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="whisper")
+
+
+# verbose_json reports the detected language by name; the language parameter
+# takes ISO-639-1. Names of the languages the API accepts:
+_LANGUAGE_CODES = {
+    "afrikaans": "af", "arabic": "ar", "armenian": "hy", "azerbaijani": "az", "belarusian": "be",
+    "bosnian": "bs", "bulgarian": "bg", "catalan": "ca", "chinese": "zh", "croatian": "hr",
+    "czech": "cs", "danish": "da", "dutch": "nl", "english": "en", "estonian": "et",
+    "finnish": "fi", "french": "fr", "galician": "gl", "german": "de", "greek": "el",
+    "hebrew": "he", "hindi": "hi", "hungarian": "hu", "icelandic": "is", "indonesian": "id",
+    "italian": "it", "japanese": "ja", "kannada": "kn", "kazakh": "kk", "korean": "ko",
+    "latvian": "lv", "lithuanian": "lt", "macedonian": "mk", "malay": "ms", "marathi": "mr",
+    "maori": "mi", "nepali": "ne", "norwegian": "no", "persian": "fa", "polish": "pl",
+    "portuguese": "pt", "romanian": "ro", "russian": "ru", "serbian": "sr", "slovak": "sk",
+    "slovenian": "sl", "spanish": "es", "swahili": "sw", "swedish": "sv", "tagalog": "tl",
+    "tamil": "ta", "thai": "th", "turkish": "tr", "ukrainian": "uk", "urdu": "ur",
+    "vietnamese": "vi", "welsh": "cy",
+}
+
+
+def _whisper(file, lang_hint: Optional[str], response_format: str = "text") -> Any:
+    return get_audio_client().audio.transcriptions.create(
+        model="whisper-1",
+        file=file,
+        language=lang_hint or None,
+        response_format=response_format,
+    )
+
+
+def _language_code(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    name = name.strip().lower()
+    if name in _LANGUAGE_CODES.values():
+        return name
+    return _LANGUAGE_CODES.get(name)
+
+
+def _transcribe_chunks(chunks: List[bytes], lang_hint: Optional[str]) -> str:
+    """Chunk texts joined in order; every chunk is transcribed in one language.
+
+    Without a hint, the first chunk is transcribed alone and the language
+    Whisper detects there is passed to the rest, instead of each ~60 s chunk
+    guessing on its own (a Russian talk full of English terms would come back
+    mixed or transliterated).
+    """
+    files = [(f"chunk-{i:03d}.wav", data) for i, data in enumerate(chunks)]
+    texts: List[str] = []
+    language = lang_hint or None
+    if language is None:
+        first = _whisper(files[0], None, response_format="verbose_json")
+        texts.append(getattr(first, "text", "") or "")
+        language = _language_code(getattr(first, "language", None))
+        files = files[1:]
+    texts.extend(_chunk_executor.map(lambda f: _whisper(f, language), files))
+    return " ".join(t.strip() for t in texts if t and t.strip())
+
+
+def _chunk_bounds(intervals: np.ndarray, n: int, sr: int) -> List[Tuple[int, int]]:
+    """[start, end) sample ranges of about _CHUNK_S each, cut in the middle of pauses.
+
+    A chunk only runs past the limit when speech has no pause to cut at.
+    """
+    limit = _CHUNK_S * sr
+    cuts = [(int(e0) + int(s1)) // 2 for (_, e0), (s1, _) in zip(intervals[:-1], intervals[1:])]
+    bounds: List[Tuple[int, int]] = []
+    start = 0
+    prev: Optional[int] = None
+    for cut in cuts + [n]:
+        if cut - start > limit and prev is not None and prev > start:
+            bounds.append((start, prev))
+            start = prev
+        prev = cut
+    bounds.append((start, n))
+    return bounds
+
+
+def _wav_bytes(y: np.ndarray, sr: int) -> bytes:
+    """16-bit mono WAV of float samples in [-1, 1]."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes((np.clip(y, -1.0, 1.0) * 32767.0).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def _split_for_upload(audio_path: Path) -> Optional[List[bytes]]:
+    """WAV chunks of a long recording, or None to send the file whole."""
+    try:
+        y, sr = load_audio(audio_path, sr=_CHUNK_SR)
+    except Exception as exc:
+        _log.info("whisper_chunking_skipped", extra={"path": str(audio_path), "error": str(exc)})
+        return None
+    if y.shape[0] <= _CHUNK_S * sr:
+        return None
+    intervals = non_silent_intervals(y, sr)
+    if len(intervals) == 0:
+        return None
+    return [_wav_bytes(y[start:end], sr) for start, end in _chunk_bounds(intervals, y.shape[0], sr)]
+
+
 def transcribe_audio(audio_path: Path, lang_hint: Optional[str] = None) -> str:
     """Transcribe audio/video file to plain text using Whisper.
 
@@ -18,15 +139,14 @@ def transcribe_audio(audio_path: Path, lang_hint: Optional[str] = None) -> str:
     """
     if not audio_path.exists():
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
-    with open(audio_path, "rb") as f:
-        tr = audio_client.audio.transcriptions.create(
-            model="whisper-1",
-            file=f,
-            language=lang_hint or None,
-            response_format="text",
-        )
-    logging.getLogger(__name__).info(
+    chunks = _split_for_upload(audio_path)
+    if chunks is None:
+        with open(audio_path, "rb") as f:
+            tr = _whisper(f, lang_hint)
+    else:
+        tr = _transcribe_chunks(chunks, lang_hint)
+    _log.info(
         "whisper_transcribed",
-        extra={"path": str(audio_path), "lang_hint": lang_hint},
+        extra={"path": str(audio_path), "lang_hint": lang_hint, "chunks": len(chunks) if chunks else 1},
     )
     return tr